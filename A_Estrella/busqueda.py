@@ -0,0 +1,325 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+# ============================
+# Motor de búsqueda A* sin pygame
+# ============================
+
+# Desplazamientos de los 8 vecinos (mismo orden que la simulación) y su longitud
+MOVIMIENTOS = [(0, -1), (0, 1), (-1, 0), (1, 0),
+               (-1, -1), (-1, 1), (1, -1), (1, 1)]
+VECINOS = [(df, dc, math.hypot(df, dc)) for df, dc in MOVIMIENTOS]
+RAIZ_2 = math.sqrt(2)
+# Número de campos de distancia al objetivo que se guardan por cuadrícula
+MAX_CAMPOS = 8
+
+
+class Cuadricula:
+    """Cuadrícula M x N guardada en buffers planos indexados por fila*N+columna."""
+
+    def __init__(self, filas, columnas, bloqueado=None, riesgo=None):
+        self.filas = filas
+        self.columnas = columnas
+        n = filas * columnas
+        if bloqueado is None:
+            bloqueado = np.zeros(n, dtype=np.uint8)
+        if riesgo is None:
+            riesgo = np.zeros(n, dtype=np.float64)
+        self.bloqueado = np.asarray(bloqueado, dtype=np.uint8).reshape(-1)
+        self.riesgo = np.asarray(riesgo, dtype=np.float64).reshape(-1)
+        # Se incrementa cada vez que cambian obstáculos o riesgos
+        self.version = 0
+        # Celdas cambiadas con modificar_celda desde la última invalidar(), una por versión
+        self._cambios = []
+        self._version_base = 0
+        self._buffers = None
+        self._uniforme = None
+        self._borde = None
+        self._campos = {}
+
+    @classmethod
+    def desde_listas(cls, filas, columnas, obstaculos, celdas_peligrosas):
+        """Construye la cuadrícula a partir de la lista de obstáculos y el dict de riesgos."""
+        bloqueado = np.zeros(filas * columnas, dtype=np.uint8)
+        riesgo = np.zeros(filas * columnas, dtype=np.float64)
+        if obstaculos:
+            pos = np.asarray(list(obstaculos), dtype=np.int64)
+            bloqueado[pos[:, 0] * columnas + pos[:, 1]] = 1
+        if celdas_peligrosas:
+            pos = np.asarray(list(celdas_peligrosas.keys()), dtype=np.int64)
+            riesgo[pos[:, 0] * columnas + pos[:, 1]] = list(celdas_peligrosas.values())
+        return cls(filas, columnas, bloqueado, riesgo)
+
+    def indice(self, pos):
+        return pos[0] * self.columnas + pos[1]
+
+    def posicion(self, indice):
+        return divmod(indice, self.columnas)
+
+    def buffers(self):
+        """Devuelve (bloqueado, riesgo) como bytearray y array('d') para el bucle interno.
+
+        Indexar escalares en un ndarray es mucho más lento que en bytes/array,
+        así que la conversión se hace una vez y se reutiliza entre búsquedas.
+        """
+        if self._buffers is None:
+            self._buffers = (bytearray(self.bloqueado.tobytes()), array('d', self.riesgo.tobytes()))
+        return self._buffers
+
+    def invalidar(self):
+        """Avisa de que `bloqueado` o `riesgo` se han modificado en el sitio."""
+        self._buffers = None
+        self._uniforme = None
+        self._borde = None
+        self.version += 1
+        self._cambios.clear()
+        self._version_base = self.version
+
+    def modificar_celda(self, pos, bloqueado=None, riesgo=None):
+        """Cambia una celda en el sitio sin reconstruir los buffers planos.
+
+        Sube la versión igual que `invalidar()`; las capas derivadas (zona
+        uniforme, borde) se recalculan la próxima vez que se pidan.
+        """
+        i = self.indice(pos)
+        if bloqueado is not None:
+            self.bloqueado[i] = bloqueado
+            if self._buffers is not None:
+                self._buffers[0][i] = int(bloqueado)
+        if riesgo is not None:
+            self.riesgo[i] = riesgo
+            if self._buffers is not None:
+                self._buffers[1][i] = riesgo
+        self._uniforme = None
+        self._borde = None
+        self.version += 1
+        self._cambios.append(i)
+
+    def cambios_desde(self, version):
+        """Índices de las celdas cambiadas con `modificar_celda` desde `version`.
+
+        Devuelve None si entre medias hubo un `invalidar()`, porque entonces no
+        se sabe qué ha cambiado.
+        """
+        if version < self._version_base:
+            return None
+        return self._cambios[version - self._version_base:]
+
+    def zona_uniforme(self):
+        """bytes con 1 en las celdas sin riesgo cuyos 8 vecinos tampoco tienen riesgo.
+
+        En esas celdas todos los pasos cercanos cuestan sólo su longitud, que es
+        lo que necesita Jump Point Search para podar caminos simétricos.
+        """
+        if self._uniforme is None:
+            peligro = np.pad(self.riesgo.reshape(self.filas, self.columnas) > 0, 1)
+            dilatado = np.zeros((self.filas, self.columnas), dtype=bool)
+            for df in range(3):
+                for dc in range(3):
+                    dilatado |= peligro[df:df + self.filas, dc:dc + self.columnas]
+            self._uniforme = (~dilatado).astype(np.uint8).tobytes()
+        return self._uniforme
+
+    def con_borde(self):
+        """(bloqueado, uniforme) rodeados de un borde de obstáculos, de ancho columnas+2.
+
+        Permite recorrer la cuadrícula en línea recta sin comprobar los límites.
+        """
+        if self._borde is None:
+            forma = (self.filas, self.columnas)
+            bloqueado = np.pad(self.bloqueado.reshape(forma), 1, constant_values=1)
+            uniforme = np.pad(np.frombuffer(self.zona_uniforme(), dtype=np.uint8).reshape(forma), 1)
+            self._borde = (bloqueado.tobytes(), uniforme.tobytes())
+        return self._borde
+
+    def campo_heuristico(self, objetivo):
+        """Distancia octil de cada celda a `objetivo`, calculada de una vez con NumPy.
+
+        Sólo depende de la geometría, así que sobrevive a `invalidar()`; se
+        guardan los últimos MAX_CAMPOS objetivos.
+        """
+        campo = self._campos.get(objetivo)
+        if campo is None:
+            df = np.abs(np.arange(self.filas, dtype=np.float64) - objetivo[0])[:, None]
+            dc = np.abs(np.arange(self.columnas, dtype=np.float64) - objetivo[1])[None, :]
+            valores = df + dc + (RAIZ_2 - 2) * np.minimum(df, dc)
+            if len(self._campos) >= MAX_CAMPOS:
+                self._campos.pop(next(iter(self._campos)))
+            campo = self._campos[objetivo] = array('d', valores.tobytes())
+        return campo
+
+
+def reconstruir_camino(padre, indice, columnas):
+    """Sigue los padres desde `indice` hasta la raíz y devuelve las posiciones en orden."""
+    camino = []
+    while indice != -1:
+        camino.append(divmod(indice, columnas))
+        indice = padre[indice]
+    return camino[::-1]
+
+
+def costo_paso(cuadricula, origen, destino):
+    """Coste de moverse a una celda vecina: distancia euclidiana más el riesgo de la celda de salida."""
+    return (math.hypot(destino[0] - origen[0], destino[1] - origen[1])
+            + cuadricula.riesgo[origen[0] * cuadricula.columnas + origen[1]])
+
+
+def heuristica(nodo, objetivo):
+    """Distancia octil: cota inferior del coste con 8 vecinos y riesgo >= 0 (admisible y consistente)."""
+    df = abs(objetivo[0] - nodo[0])
+    dc = abs(objetivo[1] - nodo[1])
+    return df + dc + (RAIZ_2 - 2) * min(df, dc)
+
+
+def costo_camino(cuadricula, camino):
+    """Suma `costo_paso` a lo largo del camino."""
+    _, riesgo = cuadricula.buffers()
+    N = cuadricula.columnas
+    total = 0.0
+    for (f1, c1), (f2, c2) in zip(camino, camino[1:]):
+        total += math.hypot(f2 - f1, c2 - c1) + riesgo[f1 * N + c1]
+    return total
+
+
+def registro_busqueda(algoritmo, inicio, objetivo, expansiones, pendientes, descartes, reinserciones, pico,
+                      encontrado):
+    """Contadores de una búsqueda con heap y duplicados.
+
+    Cada entrada sacada del heap es una expansión, un descarte (celda ya
+    cerrada) o el objetivo, y `pendientes` siguen en el heap; así las
+    inserciones salen de la suma y el bucle sólo cuenta, en O(1) por paso,
+    expansiones, descartes, reinserciones (celdas que ya tenían g finita) y
+    el pico de la frontera.
+    """
+    inserciones = expansiones + descartes + encontrado + pendientes
+    return {"algoritmo": algoritmo, "inicio": list(inicio), "objetivo": list(objetivo),
+            "encontrado": bool(encontrado), "expansiones": expansiones, "inserciones": inserciones,
+            "reinserciones": reinserciones, "descartes_cerradas": descartes,
+            "pico_abierta": pico}
+
+
+def a_estrella(cuadricula, inicio, objetivo, estadisticas=None):
+    """A* sobre la cuadrícula con g, padres y cerrados en buffers planos.
+
+    La frontera es un heap de `heapq`; en vez de decrease-key se insertan
+    duplicados y las entradas de celdas ya cerradas se descartan al sacarlas.
+    El coste de paso es `costo_paso` y h sale del campo octil precalculado,
+    que es consistente, así que el camino devuelto es óptimo.
+    Devuelve la lista de posiciones desde `inicio` hasta `objetivo` o None.
+
+    Si `estadisticas` es una lista se le añade el registro de `registro_busqueda`
+    (expansiones, inserciones en el heap, reinserciones, entradas de celdas ya
+    cerradas descartadas y pico de la frontera).
+    """
+    M, N = cuadricula.filas, cuadricula.columnas
+    bloqueado, riesgo = cuadricula.buffers()
+    s = inicio[0] * N + inicio[1]
+    t = objetivo[0] * N + objetivo[1]
+    if bloqueado[t]:
+        if estadisticas is not None:
+            estadisticas.append(registro_busqueda("a_estrella", inicio, objetivo, 0, 0, 0, 0, 0, 0))
+        return None
+    h = cuadricula.campo_heuristico(objetivo)
+
+    n = M * N
+    g = array('d', [math.inf]) * n
+    padre = array('q', [-1]) * n
+    cerrado = bytearray(n)
+    heappush, heappop = heapq.heappush, heapq.heappop
+
+    medir = estadisticas is not None
+    expansiones = descartes = reinserciones = 0
+    pico = 1
+
+    g[s] = 0.0
+    abierta = [(h[s], s)]
+    while abierta:
+        _, u = heappop(abierta)
+        if cerrado[u]:
+            descartes += 1
+            continue
+        if u == t:
+            if medir:
+                estadisticas.append(registro_busqueda("a_estrella", inicio, objetivo, expansiones, len(abierta),
+                                                      descartes, reinserciones, pico, 1))
+            return reconstruir_camino(padre, t, N)
+        cerrado[u] = 1
+        fu, cu = divmod(u, N)
+        base = g[u] + riesgo[u]
+        for df, dc, paso in VECINOS:
+            f2 = fu + df
+            c2 = cu + dc
+            if 0 <= f2 < M and 0 <= c2 < N:
+                v = f2 * N + c2
+                if bloqueado[v] or cerrado[v]:
+                    continue
+                gv = base + paso
+                if gv < g[v]:
+                    if medir and g[v] != math.inf:
+                        reinserciones += 1
+                    g[v] = gv
+                    padre[v] = u
+                    heappush(abierta, (gv + h[v], v))
+        # El heap sólo crece al expandir, así que basta con mirarlo aquí
+        if medir:
+            expansiones += 1
+            if len(abierta) > pico:
+                pico = len(abierta)
+    if medir:
+        estadisticas.append(registro_busqueda("a_estrella", inicio, objetivo, expansiones, len(abierta), descartes,
+                                              reinserciones, pico, 0))
+    return None
+
+
+class CacheCaminos:
+    """Cache de segmentos (inicio, objetivo) válida mientras no cambie la versión de la cuadrícula.
+
+    Añadir o quitar un waypoint sólo recalcula los segmentos nuevos, y si la
+    lista de puntos no ha cambiado se devuelve directamente la última ruta.
+    """
+
+    def __init__(self, cuadricula, buscar=a_estrella):
+        self.cuadricula = cuadricula
+        self.buscar = buscar
+        self._version = cuadricula.version
+        self._segmentos = {}
+        self._ultima_ruta = None
+
+    def _comprobar_version(self):
+        if self.cuadricula.version != self._version:
+            self._segmentos.clear()
+            self._ultima_ruta = None
+            self._version = self.cuadricula.version
+
+    def segmento(self, inicio, objetivo):
+        self._comprobar_version()
+        clave = (inicio, objetivo)
+        if clave not in self._segmentos:
+            self._segmentos[clave] = self.buscar(self.cuadricula, inicio, objetivo)
+        return self._segmentos[clave]
+
+    def actualizar(self, inicio, objetivo, camino):
+        """Sustituye un segmento por una versión mejor (p. ej. refinada por ARA*)."""
+        self._comprobar_version()
+        self._segmentos[(inicio, objetivo)] = camino
+        self._ultima_ruta = None
+
+    def camino_completo(self, puntos):
+        """Une los segmentos entre puntos consecutivos; None si alguno no tiene camino."""
+        self._comprobar_version()
+        puntos = tuple(puntos)
+        if self._ultima_ruta is not None and self._ultima_ruta[0] == puntos:
+            return self._ultima_ruta[1]
+        camino_total = []
+        for i in range(len(puntos) - 1):
+            segmento = self.segmento(puntos[i], puntos[i + 1])
+            if segmento is None:
+                camino_total = None
+                break
+            # Evitar duplicar el punto de unión entre segmentos
+            camino_total.extend(segmento if i == 0 else segmento[1:])
+        self._ultima_ruta = (puntos, camino_total)
+        return camino_total
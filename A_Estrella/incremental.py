@@ -0,0 +1,277 @@
+import heapq
+import math
+from array import array
+
+from busqueda import RAIZ_2, VECINOS
+
+# ============================
+# Replanificación incremental (D* Lite)
+# ============================
+
+# Planificadores D* Lite que guarda BusquedaIncremental (uno por segmento, los menos usados se descartan)
+MAX_PLANIFICADORES = 32
+
+
+class DStarLite:
+    """D* Lite sobre una Cuadricula: busca hacia atrás desde el objetivo y repara el árbol.
+
+    Tras editar unas pocas celdas (`celdas_cambiadas`) sólo se vuelven a
+    expandir los nodos cuyo coste ha cambiado, y el inicio puede moverse a
+    lo largo del camino (`mover_inicio`) sin empezar de cero. Usa el mismo
+    modelo de coste que `a_estrella`, así que los caminos son igual de óptimos.
+
+    Una reparación nunca cuesta mucho más que planificar de cero: si expande
+    más nodos que el último plan completo, se abandona y se vuelve a empezar.
+    """
+
+    def __init__(self, cuadricula, inicio, objetivo):
+        self.cuadricula = cuadricula
+        self.inicio = inicio
+        self.objetivo = objetivo
+        self._t = cuadricula.indice(objetivo)
+        self._bloqueado, self._riesgo = cuadricula.buffers()
+        # Trabajo del último plan hecho desde cero (None hasta el primero)
+        self._expansiones_plan = None
+        # Expansiones del último `_calcular`, con reparación abandonada incluida
+        self._expansiones = 0
+        self._reiniciar()
+
+    def _reiniciar(self):
+        """Descarta el árbol de búsqueda y deja sólo el objetivo en la cola."""
+        n = self.cuadricula.filas * self.cuadricula.columnas
+        self.g = array('d', [math.inf]) * n
+        self.rhs = array('d', [math.inf]) * n
+        self.km = 0.0
+        self._ultimo_inicio = self.inicio
+        self._cola = []
+        self._claves = {}
+        self.rhs[self._t] = 0.0
+        self._insertar(self._t)
+
+    def _h(self, u):
+        """Distancia octil de la celda `u` al inicio actual."""
+        f, c = divmod(u, self.cuadricula.columnas)
+        df = abs(f - self.inicio[0])
+        dc = abs(c - self.inicio[1])
+        return df + dc + (RAIZ_2 - 2) * min(df, dc)
+
+    def _clave(self, u):
+        m = min(self.g[u], self.rhs[u])
+        return (m + self._h(u) + self.km, m)
+
+    def _insertar(self, u):
+        clave = self._clave(u)
+        self._claves[u] = clave
+        heapq.heappush(self._cola, (clave[0], clave[1], u))
+
+    def _tope(self):
+        """Descarta entradas obsoletas y devuelve la clave mínima válida."""
+        cola = self._cola
+        while cola:
+            k1, k2, u = cola[0]
+            if self._claves.get(u) == (k1, k2):
+                return (k1, k2), u
+            heapq.heappop(cola)
+        return (math.inf, math.inf), -1
+
+    def _actualizar_vertice(self, u):
+        """Recalcula rhs[u] como el mínimo sobre sus 8 vecinos y ajusta su entrada en la cola."""
+        bloqueado, riesgo, g = self._bloqueado, self._riesgo, self.g
+        if u != self._t:
+            M, N = self.cuadricula.filas, self.cuadricula.columnas
+            mejor = math.inf
+            if not bloqueado[u]:
+                fu, cu = divmod(u, N)
+                base = riesgo[u]
+                for df, dc, paso in VECINOS:
+                    f2 = fu + df
+                    c2 = cu + dc
+                    if 0 <= f2 < M and 0 <= c2 < N:
+                        v = f2 * N + c2
+                        if not bloqueado[v]:
+                            coste = base + paso + g[v]
+                            if coste < mejor:
+                                mejor = coste
+            self.rhs[u] = mejor
+        self._claves.pop(u, None)
+        if g[u] != self.rhs[u]:
+            self._insertar(u)
+
+    def _vecinos(self, u):
+        M, N = self.cuadricula.filas, self.cuadricula.columnas
+        fu, cu = divmod(u, N)
+        for df, dc, _ in VECINOS:
+            f2 = fu + df
+            c2 = cu + dc
+            if 0 <= f2 < M and 0 <= c2 < N:
+                yield f2 * N + c2
+
+    def _resolver(self, max_expansiones):
+        """Bucle principal de D* Lite; devuelve el trabajo hecho o None si pasa de `max_expansiones`.
+
+        El trabajo son las expansiones, pero las que suben g cuentan por 9, lo
+        que cuestan de más. Las expansiones reales se suman a `_expansiones`.
+        """
+        M, N = self.cuadricula.filas, self.cuadricula.columnas
+        s = self.cuadricula.indice(self.inicio)
+        g, rhs, t = self.g, self.rhs, self._t
+        bloqueado, riesgo = self._bloqueado, self._riesgo
+        cola, claves = self._cola, self._claves
+        expansiones = trabajo = 0
+        while True:
+            clave_vieja, u = self._tope()
+            if u == -1:
+                break
+            # Los empates con la clave del inicio también se procesan (con margen por
+            # redondeo): si no, al seguir los g desde el inicio se podría elegir un
+            # vecino con g obsoleto
+            clave_inicio = self._clave(s)[0]
+            if clave_vieja[0] > clave_inicio + 1e-9 * (1 + abs(clave_inicio)) and rhs[s] == g[s]:
+                break
+            clave_nueva = self._clave(u)
+            if clave_vieja < clave_nueva:
+                self._insertar(u)
+                continue
+            expansiones += 1
+            trabajo += 1
+            if trabajo > max_expansiones:
+                self._expansiones += expansiones
+                return None
+            heapq.heappop(cola)
+            del claves[u]
+            if g[u] > rhs[u]:
+                # g baja: a cada vecino le basta comparar su rhs con el paso hasta u
+                g[u] = gu = rhs[u]
+                fu, cu = divmod(u, N)
+                for df, dc, paso in VECINOS:
+                    f2 = fu + df
+                    c2 = cu + dc
+                    if 0 <= f2 < M and 0 <= c2 < N:
+                        v = f2 * N + c2
+                        if v != t and not bloqueado[v]:
+                            coste = riesgo[v] + paso + gu
+                            if coste < rhs[v]:
+                                rhs[v] = coste
+                                claves.pop(v, None)
+                                if g[v] != coste:
+                                    self._insertar(v)
+            else:
+                # g sube: u y sus vecinos recalculan rhs desde cero, unas 9 veces el trabajo
+                trabajo += 8
+                g[u] = math.inf
+                self._actualizar_vertice(u)
+                for v in self._vecinos(u):
+                    self._actualizar_vertice(v)
+        self._expansiones += expansiones
+        return trabajo
+
+    def _calcular(self):
+        """Repara el árbol; si la reparación sale más cara que el último plan completo, planifica de cero.
+
+        Devuelve True si ha planificado de cero.
+        """
+        self._expansiones = 0
+        if self._expansiones_plan is not None:
+            if self._resolver(self._expansiones_plan) is not None:
+                return False
+            self._reiniciar()
+        self._expansiones_plan = self._resolver(math.inf)
+        return True
+
+    def mover_inicio(self, inicio):
+        """El agente avanza: se acumula km para no tener que reordenar la cola."""
+        self.inicio = inicio
+        self.km += self._h(self.cuadricula.indice(self._ultimo_inicio))
+        self._ultimo_inicio = inicio
+
+    def celdas_cambiadas(self, posiciones):
+        """Avisa de celdas cuyo obstáculo o riesgo ya se ha cambiado en la cuadrícula.
+
+        Un cambio de riesgo sólo afecta a los pasos que salen de la celda; uno de
+        obstáculo también a los que entran, así que se revisan sus vecinos.
+        """
+        # Tras un invalidar() la cuadrícula tiene buffers nuevos
+        self._bloqueado, self._riesgo = self.cuadricula.buffers()
+        for pos in posiciones:
+            u = self.cuadricula.indice(pos)
+            self._actualizar_vertice(u)
+            for v in self._vecinos(u):
+                self._actualizar_vertice(v)
+
+    def cambiar_celda(self, pos, bloqueado=None, riesgo=None):
+        """Modifica la celda en la cuadrícula y repara la búsqueda."""
+        self.cuadricula.modificar_celda(pos, bloqueado=bloqueado, riesgo=riesgo)
+        self.celdas_cambiadas([pos])
+
+    def camino(self, estadisticas=None):
+        """Repara lo necesario y sigue los g desde el inicio; None si no hay camino.
+
+        Si `estadisticas` es una lista se le añade un registro con las
+        expansiones de la reparación y si hubo que planificar de cero.
+        """
+        desde_cero = self._calcular()
+        camino = self._seguir_g()
+        if estadisticas is not None:
+            estadisticas.append({"algoritmo": "dstar_lite", "inicio": list(self.inicio),
+                                 "objetivo": list(self.objetivo), "encontrado": camino is not None,
+                                 "expansiones": self._expansiones, "desde_cero": desde_cero})
+        return camino
+
+    def _seguir_g(self):
+        """Camino de mínimo g + paso desde el inicio hasta el objetivo, o None."""
+        M, N = self.cuadricula.filas, self.cuadricula.columnas
+        bloqueado = self._bloqueado
+        u = self.cuadricula.indice(self.inicio)
+        t = self._t
+        if self.g[u] == math.inf or bloqueado[t]:
+            return None
+        camino = [self.inicio]
+        for _ in range(M * N):
+            if u == t:
+                return camino
+            fu, cu = divmod(u, N)
+            mejor, siguiente = math.inf, -1
+            for df, dc, paso in VECINOS:
+                f2 = fu + df
+                c2 = cu + dc
+                if 0 <= f2 < M and 0 <= c2 < N:
+                    v = f2 * N + c2
+                    if not bloqueado[v] and paso + self.g[v] < mejor:
+                        mejor = paso + self.g[v]
+                        siguiente = v
+            if siguiente == -1:
+                return None
+            u = siguiente
+            camino.append(divmod(u, N))
+        return None
+
+
+class BusquedaIncremental:
+    """`buscar(cuadricula, inicio, objetivo)` que mantiene un D* Lite por segmento.
+
+    Cuando se editan celdas basta con llamar a `celdas_cambiadas`; la siguiente
+    consulta de cada segmento repara su búsqueda en lugar de repetirla. Se
+    guardan como mucho `max_planificadores`, descartando el menos usado.
+    """
+
+    def __init__(self, max_planificadores=MAX_PLANIFICADORES):
+        self.max_planificadores = max_planificadores
+        self.planificadores = {}
+
+    def __call__(self, cuadricula, inicio, objetivo, estadisticas=None):
+        clave = (inicio, objetivo)
+        # Se saca y se vuelve a meter para que el dict quede ordenado del menos al más usado
+        planificador = self.planificadores.pop(clave, None)
+        if planificador is None or planificador.cuadricula is not cuadricula:
+            # Los planificadores de una cuadrícula anterior ya no sirven
+            self.planificadores = {k: p for k, p in self.planificadores.items() if p.cuadricula is cuadricula}
+            planificador = DStarLite(cuadricula, inicio, objetivo)
+        while len(self.planificadores) >= self.max_planificadores:
+            self.planificadores.pop(next(iter(self.planificadores)))
+        self.planificadores[clave] = planificador
+        return planificador.camino(estadisticas)
+
+    def celdas_cambiadas(self, posiciones):
+        posiciones = list(posiciones)
+        for planificador in self.planificadores.values():
+            planificador.celdas_cambiadas(posiciones)
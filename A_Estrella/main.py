@@ -1,10 +1,26 @@
 import pygame
 import math
-import random
-from queue import PriorityQueue
+from functools import lru_cache
+
+import numpy as np
+
+import busqueda
+from busqueda import CacheCaminos, Cuadricula, a_estrella
+from incremental import BusquedaIncremental
+from mapas import abrir_mapa, generar_mapa
+from orden_waypoints import ordenar_waypoints
+from variantes import BusquedaAnytime, a_estrella_bidireccional, a_estrella_jps, jps_compensa
 
 # Dimensiones de la cuadrícula
 M, N = 30, 30  # M = filas, N = columnas
+# Mapa a cargar (fichero .mapa, ver mapas.py); con None se genera uno aleatorio en cada reinicio
+ARCHIVO_MAPA = None
+# Semilla de los mapas generados (None = uno distinto en cada reinicio)
+SEMILLA = None
+if ARCHIVO_MAPA:
+    # Se muestra la esquina superior izquierda del mapa, de como mucho M x N celdas
+    mapa = abrir_mapa(ARCHIVO_MAPA)
+    M, N = min(M, mapa.filas), min(N, mapa.columnas)
 TAMANO_CELDA = 15
 ANCHO_VENTANA, ALTO_VENTANA = N * TAMANO_CELDA, M * TAMANO_CELDA
 ANCHO_VENTANA += 200  # Espacio para el panel lateral (botones y métricas)
@@ -26,137 +42,216 @@ pygame.init()
 # Crear la ventana de juego
 pantalla = pygame.display.set_mode((ANCHO_VENTANA, ALTO_VENTANA))
 pygame.display.set_caption("A*")
+FPS = 60
+
+# Fuentes creadas una sola vez
+FUENTE_REINICIAR = pygame.font.Font(None, 36)
+FUENTE_BOTON = pygame.font.Font(None, 26)
+FUENTE_INFO = pygame.font.Font(None, 24)
+
+# Zonas de la ventana
+RECT_CUADRICULA = pygame.Rect(0, 0, N * TAMANO_CELDA, M * TAMANO_CELDA)
+RECT_PANEL = pygame.Rect(N * TAMANO_CELDA, 0, ANCHO_VENTANA - N * TAMANO_CELDA, ALTO_VENTANA)
+
+# Cuadrícula pre-dibujada (se rehace en reiniciar_juego) y zonas pendientes de redibujar
+fondo_cuadricula = None
+rects_pendientes = []
 
 # Variables globales para la cuadrícula y puntos
 inicio = None
 objetivo = None
 waypoints = []  # Lista de waypoints (puntos intermedios)
-obstaculos = []
-# Celdas peligrosas: diccionario con clave = (fila, columna) y valor = factor de riesgo
-celdas_peligrosas = {}
+# Cuadrícula en buffers planos usada por el motor de búsqueda (obstáculos y factores de riesgo)
+cuadricula = Cuadricula(M, N)
+# Segmentos ya calculados; se descartan al cambiar la cuadrícula
+cache_caminos = CacheCaminos(cuadricula)
 
 # Flag para el modo de agregar waypoints
 modo_waypoints = False
+# Flag para visitar los waypoints en el orden de menor coste (modo TSP)
+modo_orden_optimo = False
+# ARA*: da un camino aproximado enseguida y lo sigue refinando en los fotogramas siguientes
+busqueda_anytime = BusquedaAnytime()
+TIEMPO_REFINADO = 0.005  # Segundos de refinado por fotograma
+
+# D* Lite: al poner o quitar obstáculos repara la búsqueda de cada segmento
+busqueda_incremental = BusquedaIncremental()
+
+# Algoritmos de búsqueda seleccionables desde el panel lateral (JPS sólo si el mapa tiene poco riesgo)
+ALGORITMOS = [("A*", a_estrella), ("JPS", a_estrella_jps),
+              ("Bidir", a_estrella_bidireccional), ("ARA*", busqueda_anytime),
+              ("D* Lite", busqueda_incremental)]
+algoritmo_actual = 0
+# Expansiones del último cálculo de cada segmento (inicio, objetivo)
+expansiones_segmentos = {}
+# Órdenes ya calculados para la versión actual de la cuadrícula: (inicio, waypoints, objetivo) -> (orden, coste,
+# coste en orden de clic); se vacía al cambiar la versión y guarda como mucho MAX_ORDENES
+ordenes_calculados = {}
+version_ordenes = None
+MAX_ORDENES = 32
 
 # Calcular la diagonal y definir el límite máximo para el factor de riesgo
 DIAGONAL_CUADRICULA = math.sqrt(M**2 + N**2)
 FACTOR_RIESGO_MAX = 0.1 * DIAGONAL_CUADRICULA  # 10% de la diagonal
 
-# Función para generar obstáculos aleatorios
-def generar_obstaculos():
-    return [(i, j) for i in range(M) for j in range(N) if random.random() < 0.2]
-
-# Función para generar celdas peligrosas con factores variables
-def generar_celdas_peligrosas():
-    celdas = {}
-    for i in range(M):
-        for j in range(N):
-            if random.random() < 0.1:  # 10% de probabilidad
-                riesgo = random.uniform(0.1, FACTOR_RIESGO_MAX)
-                celdas[(i, j)] = riesgo
-    return celdas
-
-# Dibujar la cuadrícula (incluye obstáculos y celdas peligrosas con su color)
-def dibujar_cuadricula():
-    for fila in range(M):
-        for columna in range(N):
-            rect = pygame.Rect(columna * TAMANO_CELDA, fila * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
-            if (fila, columna) in obstaculos:
-                pygame.draw.rect(pantalla, ROJO, rect)
-            elif (fila, columna) in celdas_peligrosas:
-                pygame.draw.rect(pantalla, AZUL, rect)
-            else:
-                pygame.draw.rect(pantalla, BLANCO, rect)
-            pygame.draw.rect(pantalla, NEGRO, rect, 1)
+# Consultas sobre la cuadrícula actual
+def es_obstaculo(pos):
+    return bool(cuadricula.bloqueado[cuadricula.indice(pos)])
+
+def es_peligrosa(pos):
+    return cuadricula.riesgo[cuadricula.indice(pos)] > 0
+
+# Cargar el mapa del fichero o generar uno nuevo (reproducible si hay SEMILLA)
+def nueva_cuadricula():
+    if ARCHIVO_MAPA:
+        return mapa.cuadricula(0, 0, M, N)
+    return generar_mapa(M, N, SEMILLA, riesgo_max=FACTOR_RIESGO_MAX)
+
+# Texto renderizado una sola vez por (fuente, cadena, color)
+@lru_cache(maxsize=256)
+def renderizar(fuente, cadena, color):
+    return fuente.render(cadena, True, color)
+
+# Color de cada celda según la cuadrícula: obstáculo rojo, peligrosa azul, libre blanca
+def color_celda(pos):
+    i = cuadricula.indice(pos)
+    if cuadricula.bloqueado[i]:
+        return ROJO
+    if cuadricula.riesgo[i] > 0:
+        return AZUL
+    return BLANCO
+
+# Pre-dibujar toda la cuadrícula en una Surface (una sola operación con surfarray)
+def hornear_cuadricula():
+    global fondo_cuadricula
+    bloqueado = np.asarray(cuadricula.bloqueado).reshape(M, N).astype(bool)
+    peligrosa = np.asarray(cuadricula.riesgo).reshape(M, N) > 0
+    colores = np.empty((M, N, 3), dtype=np.uint8)
+    colores[:] = BLANCO
+    colores[peligrosa] = AZUL
+    colores[bloqueado] = ROJO
+    # surfarray usa (x, y): columnas primero
+    pixeles = np.repeat(np.repeat(colores.transpose(1, 0, 2), TAMANO_CELDA, axis=0), TAMANO_CELDA, axis=1)
+    # Borde negro de 1 píxel de cada celda (con celdas muy pequeñas taparía el color)
+    if TAMANO_CELDA >= 4:
+        pixeles[::TAMANO_CELDA] = NEGRO
+        pixeles[TAMANO_CELDA - 1::TAMANO_CELDA] = NEGRO
+        pixeles[:, ::TAMANO_CELDA] = NEGRO
+        pixeles[:, TAMANO_CELDA - 1::TAMANO_CELDA] = NEGRO
+    fondo_cuadricula = pygame.surfarray.make_surface(pixeles)
+    rects_pendientes.append(pantalla.get_rect())
+
+# Repintar una sola celda de la cuadrícula pre-dibujada
+def pintar_celda(pos):
+    rect = pygame.Rect(pos[1] * TAMANO_CELDA, pos[0] * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
+    pygame.draw.rect(fondo_cuadricula, color_celda(pos), rect)
+    if TAMANO_CELDA >= 4:
+        pygame.draw.rect(fondo_cuadricula, NEGRO, rect, 1)
+    rects_pendientes.append(rect)
+
+# Dibujar la cuadrícula (incluye obstáculos y celdas peligrosas con su color) copiando la zona pedida
+def dibujar_cuadricula(rect=RECT_CUADRICULA):
+    pantalla.blit(fondo_cuadricula, rect, rect)
 
 # Dibujar botón "Reiniciar"
 def dibujar_boton_reiniciar():
     rect = pygame.Rect(ANCHO_VENTANA - 180, 20, 160, 50)
     pygame.draw.rect(pantalla, AZUL_CLARO, rect)
-    font = pygame.font.Font(None, 36)
-    texto = font.render("Reiniciar", True, NEGRO)
-    pantalla.blit(texto, (ANCHO_VENTANA - 150, 30))
+    pantalla.blit(renderizar(FUENTE_REINICIAR, "Reiniciar", NEGRO), (ANCHO_VENTANA - 150, 30))
 
 # Dibujar botón "Modo Waypoints"
 def dibujar_boton_waypoints():
     rect = pygame.Rect(ANCHO_VENTANA - 180, 80, 160, 50)
     color = AZUL_CLARO if modo_waypoints else GRIS
     pygame.draw.rect(pantalla, color, rect)
-    font = pygame.font.Font(None, 26)
     estado = "ON" if modo_waypoints else "OFF"
-    texto = font.render("Modo Waypoints: " + estado, True, NEGRO)
-    pantalla.blit(texto, (ANCHO_VENTANA - 175, 95))
-
-# Clase Nodo para A*
-class Nodo:
-    def __init__(self, posicion, padre=None):
-        self.posicion = posicion
-        self.padre = padre
-        self.g = 0
-        self.h = 0
-        self.f = 0
-
-    def __lt__(self, otro):
-        return self.f < otro.f
-
-# Función heurística: distancia euclidiana + factor de riesgo si la celda es peligrosa
-def distancia_heuristica(nodo1, nodo2):
-    x1, y1 = nodo1
-    x2, y2 = nodo2
-    distancia = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-    if nodo1 in celdas_peligrosas:
-        distancia += celdas_peligrosas[nodo1]
-    return distancia
-
-# Algoritmo A*
+    pantalla.blit(renderizar(FUENTE_BOTON, "Modo Waypoints: " + estado, NEGRO), (ANCHO_VENTANA - 175, 95))
+
+# Dibujar botón "Orden óptimo"
+def dibujar_boton_orden():
+    rect = pygame.Rect(ANCHO_VENTANA - 180, 140, 160, 50)
+    color = AZUL_CLARO if modo_orden_optimo else GRIS
+    pygame.draw.rect(pantalla, color, rect)
+    estado = "ON" if modo_orden_optimo else "OFF"
+    pantalla.blit(renderizar(FUENTE_BOTON, "Orden óptimo: " + estado, NEGRO), (ANCHO_VENTANA - 175, 155))
+
+# Dibujar botón "Algoritmo" (cambia entre los solucionadores de ALGORITMOS)
+def dibujar_boton_algoritmo():
+    rect = pygame.Rect(ANCHO_VENTANA - 180, 200, 160, 50)
+    pygame.draw.rect(pantalla, AZUL_CLARO, rect)
+    texto = renderizar(FUENTE_BOTON, "Algoritmo: " + ALGORITMOS[algoritmo_actual][0], NEGRO)
+    pantalla.blit(texto, (ANCHO_VENTANA - 175, 215))
+
+# Coste de un paso: distancia euclidiana + factor de riesgo si la celda de salida es peligrosa
+def costo_paso(nodo1, nodo2):
+    return busqueda.costo_paso(cuadricula, nodo1, nodo2)
+
+# Función heurística: distancia octil hasta el objetivo, sin riesgo para que sea admisible
+def distancia_heuristica(nodo, objetivo):
+    return busqueda.heuristica(nodo, objetivo)
+
+# Algoritmo A*: envoltorio sobre el motor sin pygame de busqueda.py
 def algoritmo_a_estrella(inicio, objetivo):
-    abierta = PriorityQueue()
-    abierta.put((0, Nodo(inicio)))
-    cerrada = set()
-    nodos_cerrados = set(obstaculos)
-
-    while not abierta.empty():
-        _, nodo_actual = abierta.get()
-        if nodo_actual.posicion == objetivo:
-            camino = []
-            while nodo_actual:
-                camino.append(nodo_actual.posicion)
-                nodo_actual = nodo_actual.padre
-            return camino[::-1]
-        cerrada.add(nodo_actual.posicion)
-        for delta in [(0, -1), (0, 1), (-1, 0), (1, 0),
-                      (-1, -1), (-1, 1), (1, -1), (1, 1)]:
-            pos_sucesor = (nodo_actual.posicion[0] + delta[0],
-                            nodo_actual.posicion[1] + delta[1])
-            if 0 <= pos_sucesor[0] < M and 0 <= pos_sucesor[1] < N and pos_sucesor not in nodos_cerrados:
-                nodo_sucesor = Nodo(pos_sucesor, nodo_actual)
-                nodo_sucesor.g = nodo_actual.g + distancia_heuristica(nodo_actual.posicion, pos_sucesor)
-                nodo_sucesor.h = distancia_heuristica(pos_sucesor, objetivo)
-                nodo_sucesor.f = nodo_sucesor.g + nodo_sucesor.h
-                if pos_sucesor in cerrada:
-                    continue
-                abierta.put((nodo_sucesor.f, nodo_sucesor))
-    return None
+    return ALGORITMOS[algoritmo_actual][1](cuadricula, inicio, objetivo)
+
+# Solucionador del algoritmo actual que anota las expansiones de cada segmento para el panel
+def buscador_actual():
+    buscar = ALGORITMOS[algoritmo_actual][1]
+    expansiones_segmentos.clear()
+    def buscar_midiendo(cuadricula, inicio, objetivo):
+        registro = []
+        camino = buscar(cuadricula, inicio, objetivo, estadisticas=registro)
+        expansiones_segmentos[(inicio, objetivo)] = registro[0]["expansiones"]
+        return camino
+    return buscar_midiendo
+
+# ¿Se puede elegir el algoritmo i con la cuadrícula actual? JPS es más lento que A* en mapas con mucho riesgo
+def algoritmo_disponible(i):
+    return ALGORITMOS[i][1] is not a_estrella_jps or jps_compensa(cuadricula)
+
+# Cambiar al siguiente algoritmo disponible; los segmentos calculados con el anterior se descartan
+def cambiar_algoritmo():
+    global algoritmo_actual, cache_caminos
+    algoritmo_actual = (algoritmo_actual + 1) % len(ALGORITMOS)
+    while not algoritmo_disponible(algoritmo_actual):
+        algoritmo_actual = (algoritmo_actual + 1) % len(ALGORITMOS)
+    cache_caminos = CacheCaminos(cuadricula, buscador_actual())
+
+# Orden de menor coste para los waypoints (se guarda para no repetir los Dijkstra en cada fotograma)
+def obtener_orden_optimo(inicio, waypoints, objetivo):
+    global version_ordenes
+    if version_ordenes != cuadricula.version:
+        ordenes_calculados.clear()
+        version_ordenes = cuadricula.version
+    clave = (inicio, tuple(waypoints), objetivo)
+    if clave not in ordenes_calculados:
+        if len(ordenes_calculados) >= MAX_ORDENES:
+            ordenes_calculados.pop(next(iter(ordenes_calculados)))
+        ordenes_calculados[clave] = ordenar_waypoints(cuadricula, inicio, waypoints, objetivo)
+    return ordenes_calculados[clave]
+
+# Puntos de la ruta en el orden en que se visitan
+def puntos_ruta(inicio, waypoints, objetivo, orden_optimo=False):
+    if orden_optimo and len(waypoints) > 1:
+        waypoints = obtener_orden_optimo(inicio, waypoints, objetivo)[0]
+    return [inicio] + waypoints + [objetivo]
 
 # Calcula el camino completo (desde inicio, pasando por waypoints, hasta objetivo)
-def calcular_camino_completo(inicio, waypoints, objetivo):
+# Los segmentos se reutilizan entre fotogramas mientras no cambien los puntos ni la cuadrícula
+def calcular_camino_completo(inicio, waypoints, objetivo, orden_optimo=False):
     if inicio is None or objetivo is None:
         return None
-    camino_total = []
-    puntos = [inicio] + waypoints + [objetivo]
-    for i in range(len(puntos) - 1):
-        segmento = algoritmo_a_estrella(puntos[i], puntos[i+1])
-        if segmento is None:
-            return None
-        # Evitar duplicar el punto de unión entre segmentos
-        if i > 0:
-            segmento = segmento[1:]
-        camino_total.extend(segmento)
-    return camino_total
+    return cache_caminos.camino_completo(puntos_ruta(inicio, waypoints, objetivo, orden_optimo))
+
+# Poner o quitar un obstáculo en la cuadrícula actual (sin regenerarla)
+def alternar_obstaculo(pos):
+    cuadricula.modificar_celda(pos, bloqueado=0 if es_obstaculo(pos) else 1)
+    busqueda_incremental.celdas_cambiadas([pos])
+    pintar_celda(pos)
 
 # Manejar eventos (clics en la cuadrícula y en el panel lateral)
 def manejar_eventos(evento):
-    global inicio, objetivo, waypoints, modo_waypoints
+    global inicio, objetivo, waypoints, modo_waypoints, modo_orden_optimo
     x, y = pygame.mouse.get_pos()
 
     # Si el clic se produce en el panel lateral (x >= N * TAMANO_CELDA), procesamos botones
@@ -167,41 +262,139 @@ def manejar_eventos(evento):
         # Botón "Modo Waypoints"
         elif ANCHO_VENTANA - 180 <= x <= ANCHO_VENTANA - 20 and 80 <= y <= 130:
             modo_waypoints = not modo_waypoints
+        # Botón "Orden óptimo"
+        elif ANCHO_VENTANA - 180 <= x <= ANCHO_VENTANA - 20 and 140 <= y <= 190:
+            modo_orden_optimo = not modo_orden_optimo
+        # Botón "Algoritmo"
+        elif ANCHO_VENTANA - 180 <= x <= ANCHO_VENTANA - 20 and 200 <= y <= 250:
+            cambiar_algoritmo()
         return
 
     # Clic en la cuadrícula
     pos = (y // TAMANO_CELDA, x // TAMANO_CELDA)
+    # Con clic central se pone o quita un obstáculo
+    if evento.button == 2:
+        if pos != inicio and pos != objetivo and pos not in waypoints:
+            alternar_obstaculo(pos)
+        return
     # Si aún no se ha definido el inicio, con clic izquierdo se asigna
     if inicio is None and evento.button == 1:
-        if pos not in obstaculos:
+        if not es_obstaculo(pos):
             inicio = pos
     else:
         if modo_waypoints:
             # Mientras el modo waypoints esté activado, se agregan waypoints con clic izquierdo
-            if evento.button == 1 and pos not in obstaculos and pos not in waypoints and pos != inicio:
+            if evento.button == 1 and not es_obstaculo(pos) and pos not in waypoints and pos != inicio:
                 waypoints.append(pos)
         else:
             # Con modo waypoints desactivado, se permite asignar el nodo final (objetivo) con clic derecho
             if evento.button == 3:
-                if pos not in obstaculos and pos != inicio:
+                if not es_obstaculo(pos) and pos != inicio:
                     objetivo = pos
 
 # Reiniciar la simulación
 def reiniciar_juego():
-    global inicio, objetivo, waypoints, obstaculos, celdas_peligrosas, modo_waypoints
+    global inicio, objetivo, waypoints, modo_waypoints, cuadricula, cache_caminos
+    global modo_orden_optimo, algoritmo_actual
     inicio = None
     objetivo = None
     waypoints = []
-    obstaculos = generar_obstaculos()
-    celdas_peligrosas = generar_celdas_peligrosas()
+    cuadricula = nueva_cuadricula()
+    hornear_cuadricula()
+    if not algoritmo_disponible(algoritmo_actual):
+        algoritmo_actual = 0
+    cache_caminos = CacheCaminos(cuadricula, buscador_actual())
     modo_waypoints = False
+    modo_orden_optimo = False
+    ordenes_calculados.clear()
+    busqueda_incremental.planificadores.clear()
+    busqueda_anytime.busquedas.clear()
+    busqueda_anytime.cotas.clear()
+
+# Rectángulo que cubre el camino, los waypoints, el inicio y el objetivo (None si no hay nada)
+def rect_superpuesto(camino, waypoints, inicio, objetivo):
+    celdas = list(camino or []) + list(waypoints) + [p for p in (inicio, objetivo) if p]
+    if not celdas:
+        return None
+    filas = [p[0] for p in celdas]
+    columnas = [p[1] for p in celdas]
+    rect = pygame.Rect(min(columnas) * TAMANO_CELDA, min(filas) * TAMANO_CELDA,
+                       (max(columnas) - min(columnas) + 1) * TAMANO_CELDA,
+                       (max(filas) - min(filas) + 1) * TAMANO_CELDA)
+    return rect.clip(RECT_CUADRICULA)
+
+# Dibujar camino, waypoints, inicio y objetivo encima de la cuadrícula
+def dibujar_superpuesto(camino):
+    # Calcular y dibujar el camino como línea (para que no tape los colores de celdas y nodos)
+    if camino and len(camino) >= 2:
+        centros = [(p[1] * TAMANO_CELDA + TAMANO_CELDA // 2, p[0] * TAMANO_CELDA + TAMANO_CELDA // 2) for p in camino]
+        pygame.draw.lines(pantalla, VERDE, False, centros, 3)
 
-# Bucle principal
+    # Dibujar waypoints (en naranja)
+    for wp in waypoints:
+        rect_wp = pygame.Rect(wp[1] * TAMANO_CELDA, wp[0] * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
+        pygame.draw.rect(pantalla, NARANJA, rect_wp)
+
+    # Dibujar nodo de inicio (amarillo) y nodo final (negro)
+    if inicio:
+        rect_inicio = pygame.Rect(inicio[1] * TAMANO_CELDA, inicio[0] * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
+        pygame.draw.rect(pantalla, AMARILLO, rect_inicio)
+    if objetivo:
+        rect_objetivo = pygame.Rect(objetivo[1] * TAMANO_CELDA, objetivo[0] * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
+        pygame.draw.rect(pantalla, NEGRO, rect_objetivo)
+
+# Métricas del camino (se recalculan sólo cuando cambia el camino o la cuadrícula)
+def metricas_camino(camino):
+    if not camino:
+        return ["Camino no encontrado"]
+    total_celdas = len(camino)
+    total_peligrosas = sum(1 for pos in camino if es_peligrosa(pos))
+    total_cost = busqueda.costo_camino(cuadricula, camino)
+    return ["Total celdas: " + str(total_celdas),
+            "Celdas peligrosas: " + str(total_peligrosas),
+            "Costo total: " + str(round(total_cost, 2))]
+
+# Textos de métricas del panel lateral: las del camino más las que cambian en cada fotograma
+def lineas_metricas(camino, base):
+    if not camino:
+        return base
+    lineas = list(base)
+    # Nodos expandidos para calcular los segmentos de la ruta actual
+    puntos = puntos_ruta(inicio, waypoints, objetivo, modo_orden_optimo)
+    segmentos = list(zip(puntos, puntos[1:]))
+    if segmentos and all(s in expansiones_segmentos for s in segmentos):
+        lineas.append("Expansiones: " + str(sum(expansiones_segmentos[s] for s in segmentos)))
+    # Cota de subóptimo (coste <= cota * óptimo) mientras ARA* sigue refinando
+    if ALGORITMOS[algoritmo_actual][1] is busqueda_anytime:
+        cota = busqueda_anytime.cota(puntos)
+        lineas.append("Cota: x" + str(round(cota, 2)))
+    # Ahorro respecto a visitar los waypoints en el orden en que se pulsaron
+    if modo_orden_optimo and len(waypoints) > 1:
+        _, costo_orden, costo_clic = obtener_orden_optimo(inicio, waypoints, objetivo)
+        lineas.append("Ahorro orden: " + str(round(costo_clic - costo_orden, 2)))
+    return lineas
+
+# Dibujar el panel lateral completo (botones y métricas)
+def dibujar_panel(lineas):
+    pantalla.fill(NEGRO, RECT_PANEL)
+    dibujar_boton_reiniciar()
+    dibujar_boton_waypoints()
+    dibujar_boton_orden()
+    dibujar_boton_algoritmo()
+    for k, linea in enumerate(lineas):
+        pantalla.blit(renderizar(FUENTE_INFO, linea, BLANCO), (ANCHO_VENTANA - 180, 260 + 25 * k))
+
+# Bucle principal: sólo se redibujan y se envían a la pantalla las zonas que cambian
 def main():
-    global inicio, objetivo, waypoints, obstaculos, celdas_peligrosas, modo_waypoints
+    global inicio, objetivo, waypoints, modo_waypoints
     reiniciar_juego()
+    reloj = pygame.time.Clock()
     ejecutando = True
-    font_info = pygame.font.Font(None, 24)
+    estado_superpuesto = None
+    rect_anterior = None
+    estado_panel = None
+    estado_metricas = None
+    base_metricas = []
     while ejecutando:
         for evento in pygame.event.get():
             if evento.type == pygame.QUIT:
@@ -209,55 +402,46 @@ def main():
             elif evento.type == pygame.MOUSEBUTTONDOWN:
                 manejar_eventos(evento)
 
-        pantalla.fill(NEGRO)
-        # Primero se dibuja la cuadrícula (con obstáculos y celdas peligrosas)
-        dibujar_cuadricula()
-
-        # Calcular y dibujar el camino como línea (para que no tape los colores de celdas y nodos)
-        camino = calcular_camino_completo(inicio, waypoints, objetivo)
-        if camino and len(camino) >= 2:
-            for i in range(len(camino) - 1):
-                inicio_linea = (camino[i][1] * TAMANO_CELDA + TAMANO_CELDA // 2,
-                                camino[i][0] * TAMANO_CELDA + TAMANO_CELDA // 2)
-                fin_linea = (camino[i+1][1] * TAMANO_CELDA + TAMANO_CELDA // 2,
-                             camino[i+1][0] * TAMANO_CELDA + TAMANO_CELDA // 2)
-                pygame.draw.line(pantalla, VERDE, inicio_linea, fin_linea, 3)
-
-        # Dibujar botones del panel lateral
-        dibujar_boton_reiniciar()
-        dibujar_boton_waypoints()
-
-        # Dibujar waypoints (en naranja)
-        for wp in waypoints:
-            rect_wp = pygame.Rect(wp[1] * TAMANO_CELDA, wp[0] * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
-            pygame.draw.rect(pantalla, NARANJA, rect_wp)
-
-        # Dibujar nodo de inicio (amarillo) y nodo final (negro)
-        if inicio:
-            rect_inicio = pygame.Rect(inicio[1] * TAMANO_CELDA, inicio[0] * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
-            pygame.draw.rect(pantalla, AMARILLO, rect_inicio)
-        if objetivo:
-            rect_objetivo = pygame.Rect(objetivo[1] * TAMANO_CELDA, objetivo[0] * TAMANO_CELDA, TAMANO_CELDA, TAMANO_CELDA)
-            pygame.draw.rect(pantalla, NEGRO, rect_objetivo)
-
-        # Mostrar métricas en el panel lateral
-        if camino:
-            total_celdas = len(camino)
-            total_peligrosas = sum(1 for pos in camino if pos in celdas_peligrosas)
-            total_cost = 0
-            for i in range(len(camino) - 1):
-                total_cost += distancia_heuristica(camino[i], camino[i+1])
-            texto_total = font_info.render("Total celdas: " + str(total_celdas), True, BLANCO)
-            texto_peligrosas = font_info.render("Celdas peligrosas: " + str(total_peligrosas), True, BLANCO)
-            texto_costo = font_info.render("Costo total: " + str(round(total_cost, 2)), True, BLANCO)
-            pantalla.blit(texto_total, (ANCHO_VENTANA - 180, 140))
-            pantalla.blit(texto_peligrosas, (ANCHO_VENTANA - 180, 165))
-            pantalla.blit(texto_costo, (ANCHO_VENTANA - 180, 190))
-        else:
-            texto_no = font_info.render("Camino no encontrado", True, BLANCO)
-            pantalla.blit(texto_no, (ANCHO_VENTANA - 180, 140))
+        # Con ARA* se siguen mejorando los segmentos que aún no son óptimos
+        if ALGORITMOS[algoritmo_actual][1] is busqueda_anytime:
+            for (a, b), segmento in busqueda_anytime.refinar(cuadricula, TIEMPO_REFINADO).items():
+                cache_caminos.actualizar(a, b, segmento)
+
+        camino = calcular_camino_completo(inicio, waypoints, objetivo, modo_orden_optimo)
+        actualizar = []
+
+        # Zona de la cuadrícula: celdas modificadas y, si cambió algo encima, el área vieja y la nueva
+        sucias = [r.clip(RECT_CUADRICULA) for r in rects_pendientes]
+        nuevo_estado = (tuple(camino) if camino else None, tuple(waypoints), inicio, objetivo)
+        if nuevo_estado != estado_superpuesto:
+            rect_nuevo = rect_superpuesto(camino, waypoints, inicio, objetivo)
+            sucias += [r for r in (rect_anterior, rect_nuevo) if r]
+            estado_superpuesto = nuevo_estado
+            rect_anterior = rect_nuevo
+        sucias = [r for r in sucias if r.width and r.height]
+        if sucias:
+            zona = sucias[0].unionall(sucias[1:])
+            dibujar_cuadricula(zona)
+            pantalla.set_clip(zona)
+            dibujar_superpuesto(camino)
+            pantalla.set_clip(None)
+            actualizar.append(zona)
+
+        # Panel lateral: sólo si cambian los botones o las métricas
+        if (nuevo_estado, cuadricula.version) != estado_metricas:
+            base_metricas = metricas_camino(camino)
+            estado_metricas = (nuevo_estado, cuadricula.version)
+        lineas = lineas_metricas(camino, base_metricas)
+        nuevo_panel = (modo_waypoints, modo_orden_optimo, algoritmo_actual, tuple(lineas))
+        if nuevo_panel != estado_panel or any(r.colliderect(RECT_PANEL) for r in rects_pendientes):
+            dibujar_panel(lineas)
+            estado_panel = nuevo_panel
+            actualizar.append(RECT_PANEL)
 
-        pygame.display.flip()
+        rects_pendientes.clear()
+        if actualizar:
+            pygame.display.update(actualizar)
+        reloj.tick(FPS)
     pygame.quit()
 
 if __name__ == "__main__":
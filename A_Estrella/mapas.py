@@ -0,0 +1,141 @@
+import math
+
+import numpy as np
+
+from busqueda import Cuadricula
+
+# ============================
+# Formato binario de mapas y generadores con semilla
+# ============================
+#
+# Cabecera de 64 bytes (little-endian): MAGIA, filas, columnas, desplazamiento
+# de los bits y desplazamiento del riesgo (uint64). Después van los obstáculos
+# como bits empaquetados fila a fila (ceil(columnas/8) bytes por fila) y el
+# riesgo como float32 fila a fila, alineado a 64 bytes. Todo se puede abrir
+# con np.memmap sin leer el fichero.
+
+MAGIA = b"MAPAAE01"
+TAM_CABECERA = 64
+# Filas que se generan o escriben de una vez
+BLOQUE_FILAS = 1024
+
+
+def _alinear(n, a=64):
+    return (n + a - 1) // a * a
+
+
+def _disposicion(filas, columnas):
+    bytes_fila = (columnas + 7) // 8
+    inicio_bits = TAM_CABECERA
+    inicio_riesgo = _alinear(inicio_bits + filas * bytes_fila)
+    return bytes_fila, inicio_bits, inicio_riesgo
+
+
+class Mapa:
+    """Mapa abierto con memoria mapeada: sólo se lee del disco lo que se pide."""
+
+    def __init__(self, ruta):
+        cabecera = np.fromfile(ruta, dtype=np.uint8, count=TAM_CABECERA)
+        if cabecera[:8].tobytes() != MAGIA:
+            raise ValueError(f"{ruta} no es un fichero de mapa")
+        filas, columnas, inicio_bits, inicio_riesgo = cabecera[8:40].view('<u8').tolist()
+        self.ruta = ruta
+        self.filas = filas
+        self.columnas = columnas
+        bytes_fila = (columnas + 7) // 8
+        self.bits = np.memmap(ruta, dtype=np.uint8, mode='r', offset=inicio_bits, shape=(filas, bytes_fila))
+        self.riesgo = np.memmap(ruta, dtype='<f4', mode='r', offset=inicio_riesgo, shape=(filas, columnas))
+
+    def bloqueado(self, f0=0, c0=0, filas=None, columnas=None):
+        """Obstáculos (uint8) de la ventana [f0, f0+filas) x [c0, c0+columnas)."""
+        filas = self.filas - f0 if filas is None else filas
+        columnas = self.columnas - c0 if columnas is None else columnas
+        b0, b1 = c0 // 8, (c0 + columnas + 7) // 8
+        bits = np.unpackbits(self.bits[f0:f0 + filas, b0:b1], axis=1)
+        return bits[:, c0 - 8 * b0:c0 - 8 * b0 + columnas]
+
+    def cuadricula(self, f0=0, c0=0, filas=None, columnas=None):
+        """Cuadricula con la ventana pedida (sólo esa parte se copia a memoria)."""
+        filas = self.filas - f0 if filas is None else filas
+        columnas = self.columnas - c0 if columnas is None else columnas
+        if f0 < 0 or c0 < 0 or f0 + filas > self.filas or c0 + columnas > self.columnas:
+            raise ValueError("la ventana se sale del mapa")
+        bloqueado = self.bloqueado(f0, c0, filas, columnas)
+        riesgo = self.riesgo[f0:f0 + filas, c0:c0 + columnas]
+        return Cuadricula(filas, columnas, bloqueado, riesgo)
+
+
+def abrir_mapa(ruta):
+    return Mapa(ruta)
+
+
+def _escribir_cabecera(f, filas, columnas):
+    _, inicio_bits, inicio_riesgo = _disposicion(filas, columnas)
+    cabecera = bytearray(TAM_CABECERA)
+    cabecera[:8] = MAGIA
+    cabecera[8:40] = np.array([filas, columnas, inicio_bits, inicio_riesgo], dtype='<u8').tobytes()
+    f.write(cabecera)
+
+
+def _escribir_por_bloques(ruta, filas, columnas, bloques):
+    """Escribe un mapa a partir de un generador de (bloqueado, riesgo) por bloques de filas."""
+    bytes_fila, inicio_bits, inicio_riesgo = _disposicion(filas, columnas)
+    with open(ruta, 'wb') as f:
+        _escribir_cabecera(f, filas, columnas)
+        f.truncate(inicio_riesgo + 4 * filas * columnas)
+        fila = 0
+        for bloqueado, riesgo in bloques:
+            n = len(bloqueado)
+            f.seek(inicio_bits + fila * bytes_fila)
+            f.write(np.packbits(np.asarray(bloqueado, dtype=bool), axis=1).tobytes())
+            f.seek(inicio_riesgo + 4 * fila * columnas)
+            f.write(np.asarray(riesgo, dtype='<f4').tobytes())
+            fila += n
+
+
+def guardar_mapa(ruta, cuadricula):
+    """Guarda una Cuadricula en el formato binario (el riesgo pasa a float32)."""
+    forma = (cuadricula.filas, cuadricula.columnas)
+    bloqueado = cuadricula.bloqueado.reshape(forma)
+    riesgo = cuadricula.riesgo.reshape(forma)
+    bloques = ((bloqueado[f:f + BLOQUE_FILAS], riesgo[f:f + BLOQUE_FILAS])
+               for f in range(0, forma[0], BLOQUE_FILAS))
+    _escribir_por_bloques(ruta, forma[0], forma[1], bloques)
+
+
+def _bloques_aleatorios(filas, columnas, semilla, p_obstaculo, p_peligro, riesgo_min, riesgo_max):
+    """Capas aleatorias por bloques de filas.
+
+    Cada capa tiene su propio generador derivado de la semilla y se consume en
+    orden, así que el resultado no depende del tamaño de bloque. El riesgo
+    se redondea a float32, el tipo del fichero, para que el mapa generado en
+    memoria y el escrito por bloques sean idénticos.
+    """
+    if riesgo_max is None:
+        riesgo_max = 0.1 * math.sqrt(filas ** 2 + columnas ** 2)
+    g_obstaculo, g_peligro, g_riesgo = (np.random.default_rng(s) for s in np.random.SeedSequence(semilla).spawn(3))
+    for f in range(0, filas, BLOQUE_FILAS):
+        forma = (min(BLOQUE_FILAS, filas - f), columnas)
+        bloqueado = (g_obstaculo.random(forma) < p_obstaculo).astype(np.uint8)
+        peligro = g_peligro.random(forma) < p_peligro
+        riesgo = np.where(peligro, g_riesgo.uniform(riesgo_min, riesgo_max, forma), 0.0).astype(np.float32)
+        yield bloqueado, riesgo
+
+
+def generar_mapa(filas, columnas, semilla=None, p_obstaculo=0.2, p_peligro=0.1, riesgo_min=0.1, riesgo_max=None):
+    """Cuadricula aleatoria reproducible: misma semilla, mismo mapa.
+
+    Por defecto reproduce la simulación original: 20 % de obstáculos y 10 % de
+    celdas peligrosas con riesgo uniforme entre 0.1 y el 10 % de la diagonal.
+    """
+    partes = list(_bloques_aleatorios(filas, columnas, semilla, p_obstaculo, p_peligro, riesgo_min, riesgo_max))
+    bloqueado = np.concatenate([b for b, _ in partes]) if partes else np.zeros((0, columnas), dtype=np.uint8)
+    riesgo = np.concatenate([r for _, r in partes]) if partes else np.zeros((0, columnas))
+    return Cuadricula(filas, columnas, bloqueado, riesgo)
+
+
+def generar_archivo_mapa(ruta, filas, columnas, semilla, p_obstaculo=0.2, p_peligro=0.1, riesgo_min=0.1,
+                         riesgo_max=None):
+    """Genera el mapa directamente en disco por bloques, sin tenerlo entero en memoria."""
+    bloques = _bloques_aleatorios(filas, columnas, semilla, p_obstaculo, p_peligro, riesgo_min, riesgo_max)
+    _escribir_por_bloques(ruta, filas, columnas, bloques)
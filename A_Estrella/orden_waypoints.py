@@ -0,0 +1,201 @@
+import heapq
+import math
+from array import array
+
+import numpy as np
+
+from busqueda import VECINOS
+
+# ============================
+# Orden óptimo de los waypoints (modo TSP)
+# ============================
+
+# Hasta este número de waypoints se usa la programación dinámica exacta
+MAX_EXACTO = 12
+
+
+def dijkstra_multiobjetivo(cuadricula, origen, objetivos):
+    """Coste mínimo desde `origen` hasta cada posición de `objetivos` (inf si no hay camino).
+
+    Es un único Dijkstra con el mismo modelo de coste que A* que se detiene
+    en cuanto ha cerrado todos los objetivos alcanzables.
+    """
+    M, N = cuadricula.filas, cuadricula.columnas
+    bloqueado, riesgo = cuadricula.buffers()
+    indices = [f * N + c for f, c in objetivos]
+    pendientes = {i for i in indices if not bloqueado[i]}
+
+    n = M * N
+    g = array('d', [math.inf]) * n
+    cerrado = bytearray(n)
+    heappush, heappop = heapq.heappush, heapq.heappop
+    s = origen[0] * N + origen[1]
+    g[s] = 0.0
+    abierta = [(0.0, s)]
+    while abierta and pendientes:
+        gu, u = heappop(abierta)
+        if cerrado[u]:
+            continue
+        cerrado[u] = 1
+        pendientes.discard(u)
+        fu, cu = divmod(u, N)
+        base = gu + riesgo[u]
+        for df, dc, paso in VECINOS:
+            f2 = fu + df
+            c2 = cu + dc
+            if 0 <= f2 < M and 0 <= c2 < N:
+                v = f2 * N + c2
+                if bloqueado[v] or cerrado[v]:
+                    continue
+                gv = base + paso
+                if gv < g[v]:
+                    g[v] = gv
+                    heappush(abierta, (gv, v))
+    return [g[i] for i in indices]
+
+
+def matriz_costes(cuadricula, puntos):
+    """Matriz (k x k) de costes entre `puntos`, con un Dijkstra multiobjetivo por fila.
+
+    No es simétrica: el coste de cada paso incluye el riesgo de la celda de salida.
+    La fila del último punto (el objetivo) no se calcula porque nunca se sale de él.
+    """
+    k = len(puntos)
+    costes = np.full((k, k), np.inf)
+    for i in range(k - 1):
+        costes[i] = dijkstra_multiobjetivo(cuadricula, puntos[i], puntos)
+    return costes
+
+
+def costo_orden(costes, ruta):
+    return float(sum(costes[a, b] for a, b in zip(ruta, ruta[1:])))
+
+
+def held_karp(costes):
+    """Orden exacto de los nodos 1..k-2 con el 0 como salida y el k-1 como llegada."""
+    k = costes.shape[0] - 2
+    if k <= 0:
+        return list(range(costes.shape[0]))
+    w = costes[1:k + 1, 1:k + 1]
+    completo = (1 << k) - 1
+    dp = np.full((1 << k, k), np.inf)
+    padre = np.full((1 << k, k), -1, dtype=np.int64)
+    for j in range(k):
+        dp[1 << j, j] = costes[0, j + 1]
+    for mascara in range(1, completo + 1):
+        if mascara & (mascara - 1) == 0:
+            continue
+        for j in range(k):
+            bit = 1 << j
+            if not mascara & bit:
+                continue
+            previo = mascara ^ bit
+            # dp[previo, i] sólo es finito para los i de `previo` con ruta hasta ellos
+            candidatos = dp[previo] + w[:, j]
+            i = int(np.argmin(candidatos))
+            if candidatos[i] == np.inf:
+                continue
+            dp[mascara, j] = candidatos[i]
+            padre[mascara, j] = i
+    finales = dp[completo] + costes[1:k + 1, k + 1]
+    ultimo = int(np.argmin(finales))
+    if finales[ultimo] == np.inf:
+        # Algún punto es inalcanzable: no hay orden válido
+        return list(range(costes.shape[0]))
+    orden = []
+    mascara = completo
+    while ultimo != -1:
+        orden.append(ultimo + 1)
+        anterior = int(padre[mascara, ultimo])
+        mascara ^= 1 << ultimo
+        ultimo = anterior
+    return [0] + orden[::-1] + [k + 1]
+
+
+def vecino_mas_cercano(costes):
+    k = costes.shape[0]
+    ruta = [0]
+    restantes = set(range(1, k - 1))
+    while restantes:
+        siguiente = min(restantes, key=lambda j: costes[ruta[-1], j])
+        ruta.append(siguiente)
+        restantes.remove(siguiente)
+    return ruta + [k - 1]
+
+
+def mejora_local(costes, ruta, max_pasadas=50):
+    """Aplica 2-opt y Or-opt (segmentos de 1 a 3) hasta que ninguno mejora la ruta.
+
+    Como la matriz no es simétrica, 2-opt usa sumas acumuladas de la ruta en
+    ambos sentidos para evaluar cada inversión en O(1).
+    """
+    ruta = list(ruta)
+    k = len(ruta)
+    for _ in range(max_pasadas):
+        mejorado = False
+        # 2-opt: invertir ruta[i..j]
+        ida = np.concatenate(([0.0], np.cumsum([costes[a, b] for a, b in zip(ruta, ruta[1:])])))
+        vuelta = np.concatenate(([0.0], np.cumsum([costes[b, a] for a, b in zip(ruta, ruta[1:])])))
+        for i in range(1, k - 2):
+            for j in range(i + 1, k - 1):
+                antes = costes[ruta[i - 1], ruta[i]] + ida[j] - ida[i] + costes[ruta[j], ruta[j + 1]]
+                despues = costes[ruta[i - 1], ruta[j]] + vuelta[j] - vuelta[i] + costes[ruta[i], ruta[j + 1]]
+                if despues < antes - 1e-9:
+                    ruta[i:j + 1] = ruta[i:j + 1][::-1]
+                    mejorado = True
+                    break
+            if mejorado:
+                break
+        if mejorado:
+            continue
+        # Or-opt: mover ruta[i..i+L-1] entre ruta[m] y ruta[m+1]
+        for longitud in (1, 2, 3):
+            for i in range(1, k - longitud):
+                a, b = ruta[i], ruta[i + longitud - 1]
+                previo, siguiente = ruta[i - 1], ruta[i + longitud]
+                ganancia = costes[previo, a] + costes[b, siguiente] - costes[previo, siguiente]
+                for m in range(k - 1):
+                    if i - 1 <= m <= i + longitud - 1:
+                        continue
+                    x, y = ruta[m], ruta[m + 1]
+                    if costes[x, a] + costes[b, y] - costes[x, y] < ganancia - 1e-9:
+                        segmento = ruta[i:i + longitud]
+                        resto = ruta[:i] + ruta[i + longitud:]
+                        destino = m + 1 if m < i else m + 1 - longitud
+                        ruta = resto[:destino] + segmento + resto[destino:]
+                        mejorado = True
+                        break
+                if mejorado:
+                    break
+            if mejorado:
+                break
+        if not mejorado:
+            break
+    return ruta
+
+
+def ordenar_waypoints(cuadricula, inicio, waypoints, objetivo, max_exacto=MAX_EXACTO):
+    """Reordena los waypoints para minimizar el coste total de inicio a objetivo.
+
+    Devuelve (waypoints_ordenados, coste_ordenado, coste_en_orden_de_clic); si no
+    existe ruta posible los waypoints se devuelven tal cual con coste inf.
+    """
+    puntos = [inicio] + list(waypoints) + [objetivo]
+    costes = matriz_costes(cuadricula, puntos)
+    clic = list(range(len(puntos)))
+    costo_clic = costo_orden(costes, clic)
+
+    if len(waypoints) <= max_exacto:
+        mejor = held_karp(costes)
+    else:
+        # Evitar inf - inf en las diferencias de la búsqueda local
+        finitos = np.where(np.isfinite(costes), costes, 1e12)
+        candidatas = [mejora_local(finitos, clic), mejora_local(finitos, vecino_mas_cercano(finitos))]
+        mejor = min(candidatas, key=lambda ruta: costo_orden(costes, ruta))
+
+    costo_mejor = costo_orden(costes, mejor)
+    if sorted(mejor) != clic or not math.isfinite(costo_mejor):
+        return list(waypoints), math.inf, costo_clic
+    if costo_mejor > costo_clic:
+        return list(waypoints), costo_clic, costo_clic
+    return [puntos[i] for i in mejor[1:-1]], costo_mejor, costo_clic
@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from busqueda import Cuadricula, a_estrella
+
+# ============================
+# Rutas en lote con varios procesos
+# ============================
+
+# Estado de cada proceso trabajador (se rellena una vez en el inicializador)
+_memoria = None
+_cuadricula = None
+_buscar = None
+
+
+def _inicializar_trabajador(nombre, filas, columnas, buscar):
+    """Se conecta a la memoria compartida y monta la cuadrícula sin copiarla."""
+    global _memoria, _cuadricula, _buscar
+    _memoria = shared_memory.SharedMemory(name=nombre)
+    n = filas * columnas
+    # El riesgo va primero para que quede alineado a 8 bytes
+    riesgo = np.ndarray((n,), dtype=np.float64, buffer=_memoria.buf, offset=0)
+    bloqueado = np.ndarray((n,), dtype=np.uint8, buffer=_memoria.buf, offset=8 * n)
+    _cuadricula = Cuadricula(filas, columnas, bloqueado, riesgo)
+    _buscar = buscar
+
+
+def _resolver(consulta):
+    inicio, objetivo = consulta
+    return _buscar(_cuadricula, inicio, objetivo)
+
+
+def resolver_lote(cuadricula, consultas, procesos=None, buscar=a_estrella):
+    """Resuelve una lista de consultas (inicio, objetivo) sobre la misma cuadrícula.
+
+    La cuadrícula se copia una sola vez a memoria compartida y cada trabajador
+    la lee desde ahí; sólo viajan entre procesos las consultas y los caminos.
+    Devuelve los caminos (o None) en el mismo orden que las consultas, idénticos
+    a los que daría `buscar` en serie.
+    """
+    consultas = list(consultas)
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    procesos = min(procesos, len(consultas))
+    if procesos <= 1:
+        return [buscar(cuadricula, inicio, objetivo) for inicio, objetivo in consultas]
+
+    n = cuadricula.filas * cuadricula.columnas
+    memoria = shared_memory.SharedMemory(create=True, size=9 * n)
+    try:
+        np.ndarray((n,), dtype=np.float64, buffer=memoria.buf, offset=0)[:] = cuadricula.riesgo
+        np.ndarray((n,), dtype=np.uint8, buffer=memoria.buf, offset=8 * n)[:] = cuadricula.bloqueado
+        argumentos = (memoria.name, cuadricula.filas, cuadricula.columnas, buscar)
+        with ProcessPoolExecutor(procesos, initializer=_inicializar_trabajador, initargs=argumentos) as ejecutor:
+            tam_bloque = max(1, len(consultas) // (4 * procesos))
+            return list(ejecutor.map(_resolver, consultas, chunksize=tam_bloque))
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+
+def tramos(puntos):
+    """Convierte [inicio] + waypoints + [objetivo] en la lista de consultas por tramo."""
+    return list(zip(puntos[:-1], puntos[1:]))
@@ -1,95 +1,428 @@
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
-from collections import Counter
-
-def load_train(path):
-    """Carga datos de entrenamiento con etiquetas de clase al final."""
-    X_list, y_list = [], []
-    with open(path, 'r') as f:
-        for line in f:
-            if not line.strip(): continue
-            parts = line.strip().split(',')
-            feats = list(map(float, parts[:4]))
-            label = parts[4]
-            X_list.append(feats)
-            y_list.append(label)
-    X = np.array(X_list)
-    label_map = {"Iris-setosa": 0, "Iris-versicolor": 1}
-    y = np.array([label_map[l] for l in y_list])
-    return X, y
-
-def load_test(path):
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from cargador_csv import cargar_csv
+
+def load_train(path, dtype=np.float64):
+    """Carga datos de entrenamiento con etiquetas de clase al final.
+
+    Devuelve (X, y, clases); los códigos de y se asignan en orden de aparición.
+    """
+    columnas, categorias = cargar_csv(path, tipos=['num'] * 4 + ['cat'], dtype=dtype)
+    X = np.column_stack(columnas[:4])
+    return X, np.asarray(columnas[4], dtype=np.int64), categorias[4]
+
+def load_test(path, dtype=np.float64):
     """Carga datos de test, descarta columna de etiqueta si existe."""
-    X_list = []
-    with open(path, 'r') as f:
-        for line in f:
-            if not line.strip(): continue
-            parts = line.strip().split(',')
-            feats = list(map(float, parts[:4]))
-            X_list.append(feats)
-    return np.array(X_list)
-
-def fuzzy_kmeans(X, k, tol=0.01, b=2, max_iter=100):
-    centroids = np.array([[4.6,3.0,4.0,0.0],[6.8,3.4,4.6,0.7]])
-    for _ in range(max_iter):
-        dist = np.linalg.norm(X[:,None]-centroids[None,:],axis=2)
-        dist = np.maximum(dist,1e-6)
-        U = (1.0/dist**(2/(b-1)))
-        U /= U.sum(axis=1,keepdims=True)
-        new_cent = np.zeros_like(centroids)
-        for i in range(k):
-            w = U[:,i]**b
-            new_cent[i] = (w[:,None]*X).sum(axis=0)/w.sum()
-        if np.max(np.linalg.norm(new_cent-centroids,axis=1))<tol: break
-        centroids = new_cent
+    columnas, _ = cargar_csv(path, tipos=['num'] * 4, estricto=False, dtype=dtype)
+    return np.column_stack(columnas)
+
+def sq_distances(X, centroids, c2=None):
+    """Distancias al cuadrado de cada fila a cada centroide con ||x||^2 - 2 x.c + ||c||^2 (una GEMM)."""
+    if c2 is None: c2=(centroids**2).sum(axis=1)
+    D=(X**2).sum(axis=1)[:,None]-2*(X@centroids.T)+c2[None,:]
+    return np.maximum(D,0,out=D)
+
+def kmeans_pp(X, k, seed=0, chunk=65536):
+    """Semillas k-means++: cada centro nuevo se elige con probabilidad proporcional a D(x)^2."""
+    rng=np.random.default_rng(seed)
+    n=len(X)
+    centroids=np.empty((k,X.shape[1]))
+    centroids[0]=X[rng.integers(n)]
+    D=np.full(n,np.inf)
+    for j in range(1,k):
+        for i in range(0,n,chunk):
+            D[i:i+chunk]=np.minimum(D[i:i+chunk],sq_distances(np.asarray(X[i:i+chunk],dtype=np.float64),centroids[j-1:j])[:,0])
+        total=D.sum()
+        # Si todos los puntos coinciden con algún centro se elige uno al azar
+        centroids[j]=X[rng.choice(n,p=D/total) if total>0 else rng.integers(n)]
     return centroids
 
-def bayes_train(X, y):
-    params={}
-    for c in np.unique(y):
-        Xc=X[y==c]
-        params[c]=(Xc.mean(axis=0), np.cov(Xc,rowvar=False), Xc.shape[0]/X.shape[0])
-    return params
-
-def bayes_predict(X, params):
-    preds=[]
-    for x in X:
-        scores={}
-        for c,(mu,C,prior) in params.items():
-            d=x-mu; det=np.linalg.det(C); inv=np.linalg.inv(C)
-            coef=1/((2*np.pi)**(len(x)/2)*np.sqrt(det))
-            like=coef*np.exp(-0.5*d.dot(inv).dot(d))
-            scores[c]=like*prior
-        preds.append(max(scores,key=scores.get))
-    return np.array(preds)
-
-def lloyd(X, k, eta=0.1, max_iter=10):
-    centroids = np.array([[4.6,3.0,4.0,0.0],[6.8,3.4,4.6,0.7]])
+def _registro_iteraciones(algoritmo, desplazamientos, tol):
+    """Registro de convergencia: iteraciones hechas y desplazamiento máximo de los centroides en cada una."""
+    return {"algoritmo":algoritmo,"iteraciones":len(desplazamientos),
+            "convergio":bool(desplazamientos) and desplazamientos[-1]<tol,"desplazamientos":desplazamientos}
+
+def fuzzy_kmeans(X, k, tol=0.01, b=2, max_iter=100, init=None, seed=0, chunk=65536, estadisticas=None):
+    """K-means borroso recorriendo X por bloques: nunca se crea el tensor n x k x d.
+
+    Las pertenencias de cada bloque se usan en el acto para acumular las sumas
+    ponderadas de los centroides, así que la memoria es O(chunk*k + k*d).
+    Si `estadisticas` es una lista se le añade el registro de `_registro_iteraciones`.
+    """
+    centroids=np.array(init,dtype=np.float64) if init is not None else kmeans_pp(X,k,seed,chunk)
+    dtype=np.asarray(X[:1]).dtype if np.issubdtype(np.asarray(X[:1]).dtype,np.floating) else np.float64
+    desplazamientos=[]
     for _ in range(max_iter):
-        for x in X:
-            j=np.argmin(np.linalg.norm(centroids-x,axis=1))
-            centroids[j]+=eta*(x-centroids[j])
+        cent=centroids.astype(dtype); c2=(cent**2).sum(axis=1)
+        num=np.zeros_like(centroids); den=np.zeros(k)
+        for i in range(0,len(X),chunk):
+            Xb=np.asarray(X[i:i+chunk],dtype=dtype)
+            # dist^(-2/(b-1)) = (dist^2)^(-1/(b-1)), con la misma cota inferior dist >= 1e-6
+            U=np.maximum(sq_distances(Xb,cent,c2),1e-12)**(-1.0/(b-1))
+            U/=U.sum(axis=1,keepdims=True)
+            W=U**b
+            num+=W.T@Xb; den+=W.sum(axis=0)
+        new_cent=num/den[:,None]
+        desplazamientos.append(float(np.max(np.linalg.norm(new_cent-centroids,axis=1))))
+        if desplazamientos[-1]<tol: break
+        centroids=new_cent
+    if estadisticas is not None: estadisticas.append(_registro_iteraciones("fuzzy_kmeans",desplazamientos,tol))
     return centroids
 
-def map_clusters(X,y,centroids):
-    labels=np.argmin(np.linalg.norm(X[:,None]-centroids[None,:],axis=2),axis=1)
-    m={}
-    for cl in np.unique(labels): m[cl]=Counter(y[labels==cl]).most_common(1)[0][0]
-    return m
+def _factorizar(C, reg=0.0):
+    """Cholesky de C + lam*I con lam = reg*traza(C)/d; devuelve (C regularizada, L).
+
+    Si la matriz sigue sin ser definida positiva (clase singular: pocas
+    filas o atributos constantes) se multiplica lam por 10 hasta que lo sea.
+    """
+    d=len(C)
+    escala=np.trace(C)/d if np.trace(C)>0 else 1.0
+    lam=reg*escala
+    while True:
+        Cr=C+lam*np.eye(d) if lam>0 else C
+        try:
+            return Cr, np.linalg.cholesky(Cr)
+        except np.linalg.LinAlgError:
+            lam=max(lam*10,1e-10*escala)
+
+class BayesIncremental:
+    """Estadísticos suficientes por clase (n, media y matriz de dispersión) que se actualizan por lotes.
+
+    `partial_fit` y `merge` combinan grupos con la fórmula de Chan et al.
+    (Welford por bloques): con delta = media_b - media_a,
+    M2 = M2_a + M2_b + delta delta^T n_a n_b / n. Así se puede entrenar sobre
+    un flujo de datos o sobre fragmentos en procesos distintos (el objeto se
+    puede enviar con pickle) sin volver a cargar todo X. `params()` da el
+    mismo diccionario que `bayes_train`.
+    """
+    def __init__(self, reg=0.0):
+        self.reg=reg
+        self.n={}; self.mu={}; self.M2={}
+
+    def _combinar(self, c, n_b, mu_b, M2_b):
+        if c not in self.n:
+            self.n[c]=n_b; self.mu[c]=mu_b; self.M2[c]=M2_b
+            return
+        n_a=self.n[c]; n=n_a+n_b
+        delta=mu_b-self.mu[c]
+        self.mu[c]=self.mu[c]+delta*(n_b/n)
+        self.M2[c]=self.M2[c]+M2_b+np.outer(delta,delta)*(n_a*n_b/n)
+        self.n[c]=n
+
+    def partial_fit(self, X, y):
+        X=np.asarray(X,dtype=np.float64); y=np.asarray(y)
+        for c in np.unique(y):
+            Xc=X[y==c]
+            mu_b=Xc.mean(axis=0); R=Xc-mu_b
+            self._combinar(c.item() if isinstance(c,np.generic) else c,len(Xc),mu_b,R.T@R)
+        return self
+
+    def merge(self, otro):
+        """Añade los estadísticos de otro BayesIncremental (p. ej. de otro fragmento)."""
+        for c in otro.n:
+            self._combinar(c,otro.n[c],otro.mu[c].copy(),otro.M2[c].copy())
+        return self
+
+    def params(self):
+        """params[c] = (mu, C, prior, L_inv, log_det) como en `bayes_train`, con C regularizada si hace falta."""
+        total=sum(self.n.values())
+        params={}
+        for c in sorted(self.n):
+            # Covarianza muestral (ddof=1, como np.cov)
+            C,L=_factorizar(self.M2[c]/max(self.n[c]-1,1),self.reg)
+            log_det=2*np.log(np.diag(L)).sum()
+            params[c]=(self.mu[c], C, self.n[c]/total, np.linalg.inv(L), log_det)
+        return params
+
+def bayes_train(X, y, reg=0.0, chunk=65536):
+    """Media, covarianza y prior por clase, más el factor de Cholesky ya invertido y log|C|.
+
+    params[c] = (mu, C, prior, L_inv, log_det), con C = L L^T y L_inv = L^-1.
+    X se recorre por bloques de `chunk` filas con `BayesIncremental`; `reg`
+    y la regularización de las clases singulares se describen en `_factorizar`.
+    """
+    modelo=BayesIncremental(reg)
+    for i in range(0,len(X),chunk):
+        modelo.partial_fit(X[i:i+chunk],y[i:i+chunk])
+    return modelo.params()
+
+def bayes_log_scores(X, params, dtype=np.float64):
+    """log p(x|c) + log P(c) de cada fila para cada clase (columnas en el orden de params).
+
+    La distancia de Mahalanobis sale de ||L^-1 (x-mu)||^2: una multiplicación
+    de matrices por clase para todo el lote, sin densidades que se vayan a 0.
+    """
+    X=np.asarray(X,dtype=dtype)
+    d=X.shape[1]
+    scores=np.empty((X.shape[0],len(params)),dtype=dtype)
+    for k,(mu,_,prior,L_inv,log_det) in enumerate(params.values()):
+        z=(X-mu.astype(dtype))@L_inv.T.astype(dtype)
+        scores[:,k]=np.log(prior)-0.5*(log_det+d*np.log(2*np.pi))-0.5*np.einsum('ij,ij->i',z,z)
+    return scores
+
+def bayes_predict(X, params, dtype=np.float64, chunk=65536):
+    """Clase más probable de cada fila, procesando X por bloques de `chunk` filas."""
+    clases=np.array(list(params))
+    preds=np.empty(len(X),dtype=clases.dtype)
+    for i in range(0,len(X),chunk):
+        preds[i:i+chunk]=clases[np.argmax(bayes_log_scores(X[i:i+chunk],params,dtype),axis=1)]
+    return preds
+
+# Por encima de este número de k*d la pasada muestra a muestra usa NumPy en vez de listas
+LLOYD_ONLINE_MAX_LISTAS=64
+
+def _lloyd_online(X, centroids, eta):
+    """Una pasada muestra a muestra (batch=1), como el algoritmo original; devuelve (centroides, puntos por centroide).
+
+    Con pocos centroides y dimensiones las distancias se calculan sobre listas de
+    Python: crear temporales de NumPy por muestra cuesta más que la propia cuenta.
+    """
+    k=len(centroids)
+    cuenta=[0]*k
+    if k*centroids.shape[1]>LLOYD_ONLINE_MAX_LISTAS:
+        C=centroids.copy()
+        for x in np.asarray(X,dtype=np.float64):
+            diff=C-x
+            j=int(np.einsum('ij,ij->i',diff,diff).argmin())
+            C[j]-=eta*diff[j]
+            cuenta[j]+=1
+        return C, np.array(cuenta,dtype=np.int64)
+    C=centroids.tolist()
+    for x in np.asarray(X,dtype=np.float64).tolist():
+        j=0; mejor=math.inf
+        for i,c in enumerate(C):
+            d=0.0
+            for a,b in zip(x,c): d+=(a-b)*(a-b)
+            if d<mejor: mejor=d; j=i
+        c=C[j]
+        for i,a in enumerate(x): c[i]+=eta*(a-c[i])
+        cuenta[j]+=1
+    return np.array(C), np.array(cuenta,dtype=np.int64)
+
+def _lloyd_epoch(X, centroids, eta, batch):
+    """Una pasada de aprendizaje competitivo por mini-lotes; devuelve (centroides, puntos por centroide).
+
+    Cada lote se asigna de una vez con los centroides del inicio del lote y se
+    aplica la forma cerrada de las actualizaciones c += eta*(x-c) en orden:
+    c' = (1-eta)^m c + sum_r eta (1-eta)^(m-r) x_r. Con batch=1 es el algoritmo
+    original y se delega en `_lloyd_online`.
+    """
+    if batch==1: return _lloyd_online(X,centroids,eta)
+    centroids=centroids.copy(); k=len(centroids)
+    cuenta=np.zeros(k,dtype=np.int64)
+    for i in range(0,len(X),batch):
+        Xb=np.asarray(X[i:i+batch],dtype=np.float64)
+        labels,_=assign(Xb,centroids)
+        orden=np.argsort(labels,kind='stable')
+        m=np.bincount(labels,minlength=k)
+        inicio=np.concatenate(([0],np.cumsum(m)[:-1]))
+        # Posición r (1..m) de cada punto dentro de su centroide en este lote
+        r=np.arange(1,len(Xb)+1)-inicio[labels[orden]]
+        w=eta*(1-eta)**(m[labels[orden]]-r)
+        usados=np.flatnonzero(m)
+        centroids[usados]=((1-eta)**m[usados])[:,None]*centroids[usados]+np.add.reduceat(w[:,None]*Xb[orden],inicio[usados],axis=0)
+        cuenta+=m
+    return centroids, cuenta
+
+# Estado de cada proceso trabajador de lloyd (se rellena en el inicializador)
+_memoria=None
+_X_compartida=None
+
+def _inicializar_lloyd(nombre, forma, tipo):
+    global _memoria, _X_compartida
+    _memoria=shared_memory.SharedMemory(name=nombre)
+    _X_compartida=np.ndarray(forma,dtype=tipo,buffer=_memoria.buf)
+
+def _lloyd_fragmento(args):
+    desde,hasta,centroids,eta,batch=args
+    return _lloyd_epoch(_X_compartida[desde:hasta],centroids,eta,batch)
+
+def lloyd(X, k, eta=0.1, max_iter=None, tol=1e-4, batch=1, init=None, seed=0, procesos=1, estadisticas=None):
+    """Algoritmo de Lloyd (aprendizaje competitivo) hasta que los centroides se mueven menos de `tol`.
+
+    Por defecto actualiza muestra a muestra, como el original; con batch > 1 cada
+    mini-lote se asigna de una vez (más rápido, pero el resultado ya no es el mismo).
+    Con eta fijo la versión muestra a muestra no deja de moverse (los centroides
+    acaban oscilando alrededor del mínimo), así que `tol` casi nunca se alcanza;
+    por eso, si no se da `max_iter`, se hacen como mucho 10 pasadas con batch=1,
+    como el original, y 100 con mini-lotes.
+
+    Con procesos > 1, X se copia una vez a memoria compartida, cada proceso
+    hace la pasada sobre su fragmento partiendo de los mismos centroides y los
+    resultados se combinan ponderando por los puntos que ha recibido cada centroide.
+    Si `estadisticas` es una lista se le añade el registro de `_registro_iteraciones`.
+    """
+    centroids=np.array(init,dtype=np.float64) if init is not None else kmeans_pp(X,k,seed)
+    if max_iter is None: max_iter=10 if batch==1 else 100
+    desplazamientos=[]
+    if procesos<=1:
+        for _ in range(max_iter):
+            new_cent,_=_lloyd_epoch(X,centroids,eta,batch)
+            desplazamientos.append(float(np.max(np.linalg.norm(new_cent-centroids,axis=1))))
+            centroids=new_cent
+            if desplazamientos[-1]<tol: break
+        if estadisticas is not None: estadisticas.append(_registro_iteraciones("lloyd",desplazamientos,tol))
+        return centroids
+    X=np.asarray(X)
+    memoria=shared_memory.SharedMemory(create=True,size=max(1,X.nbytes))
+    try:
+        np.ndarray(X.shape,dtype=X.dtype,buffer=memoria.buf)[:]=X
+        cortes=np.linspace(0,len(X),procesos+1).astype(int)
+        with ProcessPoolExecutor(procesos,initializer=_inicializar_lloyd,initargs=(memoria.name,X.shape,X.dtype.str)) as ejecutor:
+            for _ in range(max_iter):
+                trabajos=[(cortes[i],cortes[i+1],centroids,eta,batch) for i in range(procesos)]
+                partes=list(ejecutor.map(_lloyd_fragmento,trabajos))
+                cuenta=sum(c for _,c in partes)
+                suma=sum(cent*c[:,None] for cent,c in partes)
+                new_cent=np.where(cuenta[:,None]>0,suma/np.maximum(cuenta,1)[:,None],centroids)
+                desplazamientos.append(float(np.max(np.linalg.norm(new_cent-centroids,axis=1))))
+                centroids=new_cent
+                if desplazamientos[-1]<tol: break
+    finally:
+        memoria.close(); memoria.unlink()
+    if estadisticas is not None: estadisticas.append(_registro_iteraciones("lloyd",desplazamientos,tol))
+    return centroids
+
+def _mas_cercano(Xb, C, D):
+    """Columna mínima de cada fila de D (= sq_distances(Xb, C)) y su distancia.
+
+    El redondeo de la GEMM depende de la forma de la llamada, así que los casi
+    empates (p. ej. centroides duplicados) se deciden con (x-c)^2 calculado
+    directamente, y a igualdad gana el índice menor. De este modo la búsqueda
+    exhaustiva y el KD-tree eligen siempre el mismo centroide.
+    """
+    j=np.argmin(D,axis=1); filas=np.arange(len(Xb))
+    dist=D[filas,j]
+    margen=1e-12*((Xb**2).sum(axis=1)+(C**2).sum(axis=1).max())+1e-300
+    limite=(dist+margen)[:,None]
+    dudosas=np.flatnonzero(np.count_nonzero(D<=limite,axis=1)>1)
+    if len(dudosas):
+        r,c=np.nonzero(D[dudosas]<=limite[dudosas]); r=dudosas[r]
+        exacta=((Xb[r]-C[c])**2).sum(axis=1)
+        orden=np.lexsort((c,exacta,r))
+        primero=orden[np.r_[True,r[orden][1:]!=r[orden][:-1]]]
+        j[r[primero]]=c[primero]; dist[r[primero]]=exacta[primero]
+    return j, dist
+
+# A partir de este número de centroides cluster_predict usa el KD-tree
+KD_MIN_K=256
+
+class CentroidIndex:
+    """KD-tree sobre los centroides para asignar lotes de puntos sin calcular las n x k distancias.
+
+    Las consultas se agrupan por la hoja a la que bajan; para cada grupo se toma
+    como cota la peor de sus distancias a los centroides de esa hoja y sólo se
+    comparan con GEMM los centroides de las hojas cuya caja está a menos de
+    esa cota de la caja del grupo. El resultado es exacto.
+    """
+    def __init__(self, centroids, leaf_size=32):
+        self.centroids=np.asarray(centroids,dtype=np.float64)
+        self.c2=(self.centroids**2).sum(axis=1)
+        self.dim=[]; self.split=[]; self.children=[]; leaves=[]
+        def build(idx):
+            nodo=len(self.dim)
+            self.dim.append(-1); self.split.append(0.0); self.children.append((-1,-1))
+            pts=self.centroids[idx]
+            if len(idx)<=leaf_size or np.ptp(pts,axis=0).max()==0:
+                # Las hojas se numeran en negativo: -1 es la hoja 0
+                self.children[nodo]=(-1-len(leaves),-1); leaves.append(np.sort(idx)); return nodo
+            d=int(np.argmax(np.ptp(pts,axis=0)))
+            orden=idx[np.argsort(pts[:,d],kind='stable')]
+            mitad=len(orden)//2
+            self.dim[nodo]=d; self.split[nodo]=float(self.centroids[orden[mitad],d])
+            izq=orden[:mitad]; der=orden[mitad:]
+            self.children[nodo]=(build(izq),build(der))
+            return nodo
+        build(np.arange(len(self.centroids)))
+        self.dim=np.array(self.dim); self.split=np.array(self.split); self.children=np.array(self.children)
+        self.leaves=leaves
+        self.lo=np.array([self.centroids[l].min(axis=0) for l in leaves])
+        self.hi=np.array([self.centroids[l].max(axis=0) for l in leaves])
+
+    def query(self, X):
+        X=np.asarray(X)
+        n=len(X)
+        nodo=np.zeros(n,dtype=np.int64)
+        activas=np.arange(n)
+        # Bajar todas las consultas a la vez, un nivel por iteración
+        while len(activas):
+            actual=nodo[activas]
+            internas=self.dim[actual]>=0
+            if not internas.any(): break
+            activas=activas[internas]; actual=actual[internas]
+            derecha=X[activas,self.dim[actual]]>=self.split[actual]
+            nodo[activas]=self.children[actual,derecha.astype(np.int64)]
+        hoja=-1-self.children[nodo,0]
+        labels=np.empty(n,dtype=np.int64); dist=np.empty(n,dtype=X.dtype)
+        orden=np.argsort(hoja,kind='stable')
+        cortes=np.flatnonzero(np.diff(hoja[orden]))+1
+        for grupo in np.split(orden,cortes):
+            if not len(grupo): continue
+            Q=X[grupo]
+            propios=self.leaves[hoja[grupo[0]]]
+            cota=sq_distances(Q,self.centroids[propios],self.c2[propios]).min(axis=1).max()
+            # La cota sale de ||x||^2 - 2 x.c + ||c||^2, que pierde precisión por cancelación:
+            # se compara con holgura y la hoja propia entra siempre
+            holgura=1e-9*(cota+(Q**2).sum(axis=1).max()+self.c2[propios].max())
+            gap=np.maximum(0,np.maximum(self.lo-Q.max(axis=0),Q.min(axis=0)-self.hi))
+            candidatas=np.flatnonzero((gap**2).sum(axis=1)<=cota+holgura)
+            candidatas=np.union1d(candidatas,[hoja[grupo[0]]])
+            # Índices en orden creciente: a igualdad gana el menor, como en la búsqueda exhaustiva
+            idx=np.sort(np.concatenate([self.leaves[l] for l in candidatas]))
+            j,dist[grupo]=_mas_cercano(Q,self.centroids[idx],sq_distances(Q,self.centroids[idx],self.c2[idx]))
+            labels[grupo]=idx[j]
+        return labels, dist
+
+def assign(X, centroids, chunk=65536, index=None):
+    """Centroide más cercano de cada fila y su distancia al cuadrado, en una sola pasada por bloques."""
+    centroids=np.asarray(centroids)
+    c2=(centroids**2).sum(axis=1)
+    labels=np.empty(len(X),dtype=np.int64); dist=np.empty(len(X))
+    # Sin índice, el bloque de distancias (filas x k) se limita a ~32 MB
+    if index is None: chunk=max(1,min(chunk,(1<<22)//max(1,len(centroids))))
+    for i in range(0,len(X),chunk):
+        Xb=np.asarray(X[i:i+chunk],dtype=np.float64)
+        if index is not None:
+            labels[i:i+chunk],dist[i:i+chunk]=index.query(Xb)
+            continue
+        labels[i:i+chunk],dist[i:i+chunk]=_mas_cercano(Xb,centroids,sq_distances(Xb,centroids,c2))
+    return labels, dist
+
+def map_clusters(X,y,centroids,index=None):
+    """Clase mayoritaria de cada centroide a partir de una tabla de contingencia (centroide x clase).
+
+    Devuelve un array indexado por centroide; los que no reciben puntos toman la clase mayoritaria global.
+    """
+    labels,_=assign(X,centroids,index=index)
+    clases,yc=np.unique(y,return_inverse=True)
+    k=len(centroids); m=len(clases)
+    tabla=np.bincount(labels*m+yc,minlength=k*m).reshape(k,m)
+    mapping=np.where(tabla.any(axis=1),tabla.argmax(axis=1),tabla.sum(axis=0).argmax())
+    return clases[mapping]
 
-def cluster_predict(X,centroids,mapping):
-    labels=np.argmin(np.linalg.norm(X[:,None]-centroids[None,:],axis=2),axis=1)
-    return np.array([mapping[l] for l in labels])
+def cluster_predict(X,centroids,mapping,index=None):
+    if index is None and len(centroids)>=KD_MIN_K: index=CentroidIndex(centroids)
+    return np.asarray(mapping)[assign(X,centroids,index=index)[0]]
 
 if __name__=='__main__':
     # Datos y tests
-    X_train,y_train=load_train('Iris2Clases.txt')
+    X_train,y_train,clases=load_train('Iris2Clases.txt')
     tests=['TestIris01.txt','TestIris02.txt','TestIris03.txt']
-    inv={0:'Iris-setosa',1:'Iris-versicolor'}
+    inv=dict(enumerate(clases))
 
     # Calcular resultados
     res = {}
+    # Iteraciones hasta converger de cada algoritmo de clustering
+    iteraciones = []
     # K-Means Borroso
-    c1 = fuzzy_kmeans(X_train, 2)
+    c1 = fuzzy_kmeans(X_train, 2, estadisticas=iteraciones)
     m1 = map_clusters(X_train, y_train, c1)
     res['Fuzzy K-Means'] = [', '.join(inv[p] for p in cluster_predict(load_test(f), c1, m1)) for f in tests]
 
@@ -100,46 +433,48 @@ if __name__=='__main__':
     res['Bayes'] = [', '.join(inv[p] for p in bayes_predict(load_test(f), params)) for f in tests]
 
     # Lloyd
-    c3 = lloyd(X_train, 2)
+    c3 = lloyd(X_train, 2, estadisticas=iteraciones)
+    for r in iteraciones:
+        print(f"{r['algoritmo']}: {r['iteraciones']} iteraciones, {'convergió' if r['convergio'] else 'sin converger'}")
     m3 = map_clusters(X_train, y_train, c3)
     res['Lloyd'] = [', '.join(inv[p] for p in cluster_predict(load_test(f), c3, m3)) for f in tests]
 
-# Interfaz con tkinter y ttk.Notebook
-try:
-    import tkinter as tk
-    from tkinter import ttk
-    root = tk.Tk()
-    root.title('Resultados de Clasificación')
-    notebook = ttk.Notebook(root)
-    notebook.pack(expand=1, fill='both', padx=10, pady=10)
-    for method, outs in res.items():
-        frame = ttk.Frame(notebook)
-        notebook.add(frame, text=method)
-        # Mostrar medias
-        ttk.Label(frame, text='Medias/inciales:', font=('Arial', 10, 'bold'), padding=(10,5)).pack(anchor='w')
-        if method == 'Bayes':
-            for c, (mu, _, _) in params.items():
-                cls_name = inv[c]
-                ttk.Label(frame, text=f"{cls_name}: {np.array2string(mu, precision=2, suppress_small=True)}", padding=(20,5)).pack(anchor='w')
-        else:
-            cents = c1 if method == 'Fuzzy K-Means' else c3
-            for idx, cent in enumerate(cents):
-                ttk.Label(frame, text=f"Centro {idx+1}: {np.array2string(cent, precision=2, suppress_small=True)}", padding=(20,5)).pack(anchor='w')
-        # Espacio tras medias
-        ttk.Label(frame, text='').pack()
-        # Mostrar contenido según método
-        if method == 'Bayes':
-            ttk.Label(frame, text='Matrices de covarianza:', font=('Arial', 10, 'bold'), padding=(10,5)).pack(anchor='w')
+    # Interfaz con tkinter y ttk.Notebook
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+        root.title('Resultados de Clasificación')
+        notebook = ttk.Notebook(root)
+        notebook.pack(expand=1, fill='both', padx=10, pady=10)
+        for method, outs in res.items():
+            frame = ttk.Frame(notebook)
+            notebook.add(frame, text=method)
+            # Mostrar medias
+            ttk.Label(frame, text='Medias/inciales:', font=('Arial', 10, 'bold'), padding=(10,5)).pack(anchor='w')
+            if method == 'Bayes':
+                for c, (mu, *_) in params.items():
+                    cls_name = inv[c]
+                    ttk.Label(frame, text=f"{cls_name}: {np.array2string(mu, precision=2, suppress_small=True)}", padding=(20,5)).pack(anchor='w')
+            else:
+                cents = c1 if method == 'Fuzzy K-Means' else c3
+                for idx, cent in enumerate(cents):
+                    ttk.Label(frame, text=f"Centro {idx+1}: {np.array2string(cent, precision=2, suppress_small=True)}", padding=(20,5)).pack(anchor='w')
+            # Espacio tras medias
             ttk.Label(frame, text='').pack()
-            for cls, C in covs.items():
-                ttk.Label(frame, text=f"{cls}: {np.array2string(C, precision=2, suppress_small=True)}", padding=(20,5)).pack(anchor='w')
-            ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=5)
-        for fname, res_str in zip(tests, outs):
-            lbl = ttk.Label(frame, text=f"{fname}: {res_str}", padding=(10,5))
-            lbl.pack(anchor='w')
-    root.mainloop()
-except Exception as e:
-    print('Error GUI, mostrando consola:', e)
-    for method, outs in res.items():
-        print(f'--- {method} ---')
-        for fname, out in zip(tests, outs): print(f"{fname}: {out}")
+            # Mostrar contenido según método
+            if method == 'Bayes':
+                ttk.Label(frame, text='Matrices de covarianza:', font=('Arial', 10, 'bold'), padding=(10,5)).pack(anchor='w')
+                ttk.Label(frame, text='').pack()
+                for cls, C in covs.items():
+                    ttk.Label(frame, text=f"{cls}: {np.array2string(C, precision=2, suppress_small=True)}", padding=(20,5)).pack(anchor='w')
+                ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=5)
+            for fname, res_str in zip(tests, outs):
+                lbl = ttk.Label(frame, text=f"{fname}: {res_str}", padding=(10,5))
+                lbl.pack(anchor='w')
+        root.mainloop()
+    except Exception as e:
+        print('Error GUI, mostrando consola:', e)
+        for method, outs in res.items():
+            print(f'--- {method} ---')
+            for fname, out in zip(tests, outs): print(f"{fname}: {out}")
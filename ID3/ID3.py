@@ -1,112 +1,447 @@
-import math
-import pygame
+import os
 import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from cargador_csv import cargar_csv, detectar_tipos
+
+from .prediccion import ArbolCompilado
+
+# Se ejecuta desde la raíz del repositorio: python -m ID3.ID3
+CARPETA = os.path.dirname(os.path.abspath(__file__))
 
 # ============================
 # Funciones para ID3
 # ============================
 
-def calcular_infor(p, n):
-    """Calcula -p log2(p) - n log2(n), sustituyendo log(0) por 0"""
-    term1 = -p * math.log2(p) if p > 0 else 0
-    term2 = -n * math.log2(n) if n > 0 else 0
-    return term1 + term2
-
-def calcular_entropia(datos):
-    total = len(datos)
-    pos = 0
-    neg = 0
-    for ejemplo in datos:
-        decision = ejemplo["Jugar"].strip().lower()
-        if decision == "positivo":
-            pos += 1
-        else:
-            neg += 1
-    p = pos / total
-    n = neg / total
-    return calcular_infor(p, n)
-
-def calcular_ganancia_informacion(atributo, ejemplos):
-    entropia_total = calcular_entropia(ejemplos)
-    valores = set(ej[atributo].strip() for ej in ejemplos)
-    sub_entropia = 0
-    for valor in valores:
-        subset = [ej for ej in ejemplos if ej[atributo].strip() == valor]
-        sub_entropia += (len(subset) / len(ejemplos)) * calcular_entropia(subset)
-    return entropia_total - sub_entropia
-
-def id3(ejemplos, atributos, nivel=0):
-    decisions = [ej["Jugar"].strip() for ej in ejemplos]
-    # Si todos los ejemplos tienen la misma etiqueta, retorna esa etiqueta.
-    if len(set(decisions)) == 1:
-        return decisions[0]
-    # Si ya no quedan atributos para dividir, retorna la etiqueta mayoritaria.
-    if not atributos:
-        return max(set(decisions), key=decisions.count)
-    # Seleccionar el mejor atributo según la ganancia de información.
-    mejor_atributo = max(atributos, key=lambda attr: calcular_ganancia_informacion(attr, ejemplos))
-    tree = {mejor_atributo: {}}
-    valores = set(ej[mejor_atributo].strip() for ej in ejemplos)
-    for valor in valores:
-        subset = [ej for ej in ejemplos if ej[mejor_atributo].strip() == valor]
-        nuevos_atributos = [attr for attr in atributos if attr != mejor_atributo]
-        subtree = id3(subset, nuevos_atributos, nivel + 1)
-        tree[mejor_atributo][valor] = subtree
+def entropia(conteos):
+    """Entropía de Shannon de cada fila de `conteos`, sustituyendo 0·log2(0) por 0"""
+    conteos = np.asarray(conteos, dtype=np.float64)
+    total = conteos.sum(axis=-1, keepdims=True)
+    p = conteos / np.where(total > 0, total, 1)
+    return (-p * np.log2(np.where(p > 0, p, 1))).sum(axis=-1)
+
+def codificar_ejemplos(ejemplos, atributos):
+    """Codifica la lista de ejemplos una sola vez como matriz de enteros (una columna por atributo).
+
+    Devuelve (X, categorias), donde categorias[j][k] es el valor original del código k de la columna j.
+    """
+    X = np.empty((len(ejemplos), len(atributos)), dtype=np.int32, order='F')
+    categorias = []
+    for j, attr in enumerate(atributos):
+        valores, codigos = np.unique([ej[attr].strip() for ej in ejemplos], return_inverse=True)
+        X[:, j] = codigos
+        categorias.append([str(v) for v in valores])
+    return X, categorias
+
+def mejor_umbral(valores, yi, n_clases, entropia_nodo):
+    """Mejor corte binario `valor <= t` de una columna numérica (estilo C4.5).
+
+    Cuenta las clases por valor distinto con np.bincount y evalúa todos los
+    cortes entre valores distintos con los recuentos acumulados, en
+    O(n log n) y con memoria O(U x clases) para U valores distintos. Los NaN
+    (valores que faltan) van siempre por la rama `> t`. Devuelve
+    (ganancia, t), o (-inf, nan) si no hay dos valores distintos.
+    """
+    conocidos = ~np.isnan(valores)
+    unicos, grupo = np.unique(valores[conocidos], return_inverse=True)
+    if len(unicos) < 2:
+        return -np.inf, np.nan
+    tabla = np.bincount(grupo * n_clases + yi[conocidos], minlength=len(unicos) * n_clases)
+    izquierda = np.cumsum(tabla.reshape(len(unicos), n_clases), axis=0)[:-1]
+    derecha = np.bincount(yi, minlength=n_clases) - izquierda
+    n = len(valores)
+    n_izquierda = izquierda.sum(axis=1)
+    ganancias = entropia_nodo - (n_izquierda * entropia(izquierda) + (n - n_izquierda) * entropia(derecha)) / n
+    b = int(np.argmax(ganancias))
+    a, c = unicos[b], unicos[b + 1]
+    t = (a + c) / 2
+    # Si el punto medio se redondea hasta el valor de la derecha, cortar en el de la izquierda
+    return ganancias[b], float(a if t >= c else t)
+
+def calcular_ganancias(X, y, indices, columnas, cardinalidades, n_clases):
+    """Ganancia de información de cada columna de `columnas` sobre las filas `indices`.
+
+    La entropía del nodo se calcula una vez y cada atributo categórico sale de
+    una tabla de contingencia (valor x clase) construida con np.bincount. Las
+    columnas numéricas (cardinalidad None) usan su mejor umbral. Devuelve
+    (ganancias, umbrales), con umbral nan en las categóricas.
+    """
+    yi = y[indices]
+    n = len(indices)
+    entropia_nodo = entropia(np.bincount(yi, minlength=n_clases))
+    ganancias = np.empty(len(columnas))
+    umbrales = np.full(len(columnas), np.nan)
+    for k, j in enumerate(columnas):
+        if cardinalidades[j] is None:
+            ganancias[k], umbrales[k] = mejor_umbral(X[indices, j], yi, n_clases, entropia_nodo)
+            continue
+        codigos = X[indices, j].astype(np.int64, copy=False)
+        tabla = np.bincount(codigos * n_clases + yi, minlength=cardinalidades[j] * n_clases)
+        tabla = tabla.reshape(cardinalidades[j], n_clases)
+        ganancias[k] = entropia_nodo - (tabla.sum(axis=1) / n) @ entropia(tabla)
+    return ganancias, umbrales
+
+def claves_umbral(t):
+    """Etiquetas de las dos ramas de un corte numérico; repr(t) permite recuperar t exacto."""
+    t = float(t)
+    return f"<= {t!r}", f"> {t!r}"
+
+def mascara_rama(valores, categorias_j, clave):
+    """Filas de `valores` (una columna de X) que bajan por la rama `clave`."""
+    if categorias_j is None:
+        # Los NaN van por `> t`, como al entrenar y en ArbolCompilado.predecir
+        operador, t = clave.split(' ', 1)
+        izquierda = valores <= float(t)
+        return izquierda if operador == '<=' else ~izquierda
+    return valores == categorias_j.index(clave)
+
+# Subárboles con al menos estas filas se construyen en otro proceso
+MIN_FILAS_PARALELO = 50000
+
+def construir_arbol(X, y, atributos, categorias, clases, indices, columnas, enviar=None, min_filas=0,
+                    profundidad=0, max_profundidad=None, min_filas_division=2, min_ganancia=0.0,
+                    estadisticas=None):
+    """Recursión de ID3 sobre las filas `indices` usando los atributos `columnas`.
+
+    Un nodo se convierte en hoja con la clase mayoritaria si llega a
+    `max_profundidad`, si tiene menos de `min_filas_division` filas o si la
+    mejor ganancia no alcanza `min_ganancia`.
+
+    Si se da `enviar(indices, columnas, profundidad)`, las ramas con al menos
+    `min_filas` filas se le entregan y en el árbol queda lo que devuelva (un
+    Future) hasta que se sustituya por el subárbol.
+
+    Si `estadisticas` es una lista se le añade un diccionario por nivel con
+    `profundidad`, `nodos`, `hojas`, `evaluaciones_ganancia` (columnas
+    evaluadas) y `tiempo_s`, el tiempo propio de los nodos de ese nivel sin
+    contar el de sus hijos.
+    """
+    cardinalidades = [None if c is None else len(c) for c in categorias]
+    n_clases = len(clases)
+    por_nivel = {} if estadisticas is not None else None
+
+    def elegir(indices, columnas, profundidad):
+        """Devuelve (clase, None, 0) para una hoja o (atributo, ramas, evaluaciones) para un nodo."""
+        # Un único recuento de clases sirve para la pureza y para la mayoría
+        conteo = np.bincount(y[indices], minlength=n_clases)
+        presentes = np.flatnonzero(conteo)
+        # Si todos los ejemplos tienen la misma etiqueta, retorna esa etiqueta.
+        if len(presentes) == 1:
+            return clases[presentes[0]], None, 0
+        # Si ya no quedan atributos para dividir, retorna la etiqueta mayoritaria.
+        if not columnas:
+            return clases[int(np.argmax(conteo))], None, 0
+        # Pre-poda: profundidad máxima y tamaño mínimo para dividir.
+        if (max_profundidad is not None and profundidad >= max_profundidad) or len(indices) < min_filas_division:
+            return clases[int(np.argmax(conteo))], None, 0
+        # Seleccionar el mejor atributo según la ganancia de información.
+        ganancias, umbrales = calcular_ganancias(X, y, indices, columnas, cardinalidades, n_clases)
+        k = int(np.argmax(ganancias))
+        # Ninguna columna numérica tiene corte posible y no quedan categóricas
+        if ganancias[k] == -np.inf or (min_ganancia > 0 and ganancias[k] < min_ganancia):
+            return clases[int(np.argmax(conteo))], None, len(columnas)
+        j = columnas[k]
+        if cardinalidades[j] is None:
+            # Corte binario; la columna numérica sigue disponible más abajo
+            izquierda = X[indices, j] <= umbrales[k]
+            ramas = [(clave, filas, columnas) for clave, filas in
+                     zip(claves_umbral(umbrales[k]), (indices[izquierda], indices[~izquierda]))]
+            return atributos[j], ramas, len(columnas)
+        resto = columnas[:k] + columnas[k + 1:]
+        # Repartir las filas por valor ordenándolas una vez por la columna elegida
+        valores = X[indices, j].astype(np.int64, copy=False)
+        orden = np.argsort(valores, kind='stable')
+        cortes = np.cumsum(np.bincount(valores, minlength=cardinalidades[j]))
+        ramas = []
+        desde = 0
+        for v, hasta in enumerate(cortes):
+            if hasta > desde:
+                ramas.append((categorias[j][v], indices[orden[desde:hasta]], resto))
+            desde = hasta
+        return atributos[j], ramas, len(columnas)
+
+    def construir(indices, columnas, profundidad):
+        if por_nivel is not None:
+            t0 = time.perf_counter()
+        nombre, ramas, evaluaciones = elegir(indices, columnas, profundidad)
+        if por_nivel is not None:
+            nivel = por_nivel.setdefault(profundidad, [0, 0, 0, 0.0])
+            nivel[0] += 1
+            nivel[1] += ramas is None
+            nivel[2] += evaluaciones
+            nivel[3] += time.perf_counter() - t0
+        if ramas is None:
+            return nombre
+        tree = {nombre: {}}
+        for clave, filas, resto in ramas:
+            if enviar is not None and len(filas) >= min_filas:
+                tree[nombre][clave] = enviar(filas, resto, profundidad + 1)
+            else:
+                tree[nombre][clave] = construir(filas, resto, profundidad + 1)
+        return tree
+
+    tree = construir(indices, list(columnas), profundidad)
+    if estadisticas is not None:
+        estadisticas.extend({"profundidad": p, "nodos": nodos, "hojas": hojas,
+                             "evaluaciones_ganancia": evaluaciones, "tiempo_s": segundos}
+                            for p, (nodos, hojas, evaluaciones, segundos) in sorted(por_nivel.items()))
     return tree
 
-def leer_datos():
-    with open('AtributosJuego.txt', 'r') as f:
+def registros_niveles(registros):
+    """Suma por profundidad registros de nivel de varias construcciones (p. ej. de cada proceso)."""
+    total = {}
+    for r in registros:
+        acumulado = total.setdefault(r["profundidad"], dict.fromkeys(r, 0))
+        for clave, valor in r.items():
+            acumulado[clave] = valor if clave == "profundidad" else acumulado[clave] + valor
+    return [total[p] for p in sorted(total)]
+
+# Estado de cada proceso trabajador (se rellena una vez en el inicializador)
+_memoria = None
+_datos = None
+
+_limites = None
+
+def _inicializar_trabajador(nombre, forma, tipo, atributos, categorias, clases, limites):
+    """Monta X e y sobre la memoria compartida sin copiarlos."""
+    global _memoria, _datos, _limites
+    _memoria = shared_memory.SharedMemory(name=nombre)
+    n, m = forma
+    X = np.ndarray((n, m), dtype=tipo, buffer=_memoria.buf, offset=0, order='F')
+    y = np.ndarray((n,), dtype=np.int64, buffer=_memoria.buf, offset=_desplazamiento_y(n, m, tipo))
+    _datos = (X, y, atributos, categorias, clases)
+    _limites = limites
+
+def _desplazamiento_y(n, m, tipo):
+    # y va detrás de X, alineado a 8 bytes
+    return (np.dtype(tipo).itemsize * n * m + 7) // 8 * 8
+
+def _construir_en_trabajador(indices, columnas, profundidad, medir=False):
+    if not medir:
+        return construir_arbol(*_datos, indices, columnas, profundidad=profundidad, **_limites)
+    registros = []
+    tree = construir_arbol(*_datos, indices, columnas, profundidad=profundidad, estadisticas=registros, **_limites)
+    return tree, registros
+
+def _esperar_subarboles(tree, estadisticas=None):
+    """Sustituye en su sitio los Future del árbol por los subárboles ya construidos.
+
+    Con `estadisticas` los trabajadores devuelven (subárbol, registros) y los
+    registros se añaden a la lista.
+    """
+    if not isinstance(tree, dict):
+        return tree
+    for ramas in tree.values():
+        for valor, sub in ramas.items():
+            if isinstance(sub, Future):
+                sub = sub.result()
+                if estadisticas is not None:
+                    sub, registros = sub
+                    estadisticas.extend(registros)
+            ramas[valor] = _esperar_subarboles(sub, estadisticas)
+    return tree
+
+def id3_codificado(X, y, atributos, categorias, clases, columnas=None, procesos=1,
+                   min_filas_paralelo=MIN_FILAS_PARALELO, max_profundidad=None, min_filas_division=2,
+                   min_ganancia=0.0, estadisticas=None, profundidad=0):
+    """Construye el árbol sobre la matriz codificada.
+
+    `y` son los códigos de clase (nombres en `clases`, con cualquier número de
+    clases). La recursión sólo pasa arrays de índices de filas, nunca copias
+    de los datos. Los límites de pre-poda se describen en `construir_arbol`;
+    `profundidad` es la de la raíz, y cuenta para `max_profundidad`.
+    Con `procesos` > 1 las ramas de al menos `min_filas_paralelo`
+    filas se construyen en un pool de procesos que lee X e y de memoria
+    compartida; el árbol resultante es idéntico al de la construcción en serie.
+    Si `estadisticas` es una lista se le añaden los registros por nivel de
+    `construir_arbol`, sumando los de todos los procesos.
+    """
+    if columnas is None:
+        columnas = list(range(X.shape[1]))
+    indices = np.arange(X.shape[0])
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    limites = {"max_profundidad": max_profundidad, "min_filas_division": min_filas_division,
+               "min_ganancia": min_ganancia}
+    if procesos <= 1:
+        return construir_arbol(X, y, atributos, categorias, clases, indices, columnas,
+                               profundidad=profundidad, estadisticas=estadisticas, **limites)
+
+    n, m = X.shape
+    tipo = X.dtype.str
+    inicio_y = _desplazamiento_y(n, m, tipo)
+    memoria = shared_memory.SharedMemory(create=True, size=max(1, inicio_y + 8 * n))
+    Xc = np.ndarray((n, m), dtype=tipo, buffer=memoria.buf, offset=0, order='F')
+    yc = np.ndarray((n,), dtype=np.int64, buffer=memoria.buf, offset=inicio_y)
+    try:
+        Xc[:] = X
+        yc[:] = y
+        argumentos = (memoria.name, (n, m), tipo, list(atributos), categorias, list(clases), limites)
+        with ProcessPoolExecutor(procesos, initializer=_inicializar_trabajador, initargs=argumentos) as ejecutor:
+            medir = estadisticas is not None
+            registros = [] if medir else None
+
+            def enviar(filas, resto, profundidad):
+                return ejecutor.submit(_construir_en_trabajador, filas, resto, profundidad, medir)
+            # La raíz se reparte aquí y las ramas pequeñas se construyen mientras tanto
+            tree = construir_arbol(Xc, yc, atributos, categorias, clases, indices, columnas,
+                                   enviar=enviar, min_filas=min_filas_paralelo, profundidad=profundidad,
+                                   estadisticas=registros, **limites)
+            tree = _esperar_subarboles(tree, registros)
+            if medir:
+                estadisticas.extend(registros_niveles(registros))
+            return tree
+    finally:
+        del Xc, yc
+        memoria.close()
+        memoria.unlink()
+
+def contar_nodos(tree):
+    """Número de nodos del árbol, hojas incluidas."""
+    if not isinstance(tree, dict):
+        return 1
+    return 1 + sum(contar_nodos(sub) for ramas in tree.values() for sub in ramas.values())
+
+def podar_error_reducido(tree, X, y, X_val, y_val, atributos, categorias, clases):
+    """Poda por error reducido con un conjunto de validación (X_val, y_val).
+
+    Recorre el árbol de abajo arriba y sustituye cada subárbol por la clase
+    mayoritaria de sus filas de entrenamiento si eso no aumenta los errores
+    en validación. Las filas de validación con un valor sin rama cuentan con
+    la clase mayoritaria del nodo, el mismo respaldo que usa
+    `ArbolCompilado.compilar` con (X, y). Devuelve el árbol podado (uno nuevo).
+    """
+    columna = {a: j for j, a in enumerate(atributos)}
+    codigo_clase = {c: k for k, c in enumerate(clases)}
+    n_clases = len(clases)
+
+    def podar(nodo, ent, val, mayoria):
+        if not isinstance(nodo, dict):
+            return nodo, int(np.count_nonzero(y_val[val] != codigo_clase[nodo]))
+        ((nombre, ramas),) = nodo.items()
+        j = columna[nombre]
+        conteo = np.bincount(y[ent], minlength=n_clases)
+        if conteo.any():
+            mayoria = int(np.argmax(conteo))
+        nuevas = {}
+        errores = 0
+        cubiertas = np.zeros(len(val), dtype=bool)
+        for valor, sub in ramas.items():
+            en_rama = mascara_rama(X_val[val, j], categorias[j], valor)
+            cubiertas |= en_rama
+            nuevas[valor], e = podar(sub, ent[mascara_rama(X[ent, j], categorias[j], valor)], val[en_rama], mayoria)
+            errores += e
+        errores += int(np.count_nonzero(y_val[val[~cubiertas]] != mayoria))
+        errores_hoja = int(np.count_nonzero(y_val[val] != mayoria))
+        if errores_hoja <= errores:
+            return clases[mayoria], errores_hoja
+        return {nombre: nuevas}, errores
+
+    mayoria = int(np.argmax(np.bincount(y, minlength=n_clases)))
+    return podar(tree, np.arange(len(y)), np.arange(len(y_val)), mayoria)[0]
+
+def codificar_clase(ejemplos, clase):
+    """Códigos de la columna de clase; devuelve (y, clases)."""
+    clases, y = np.unique([ej[clase].strip() for ej in ejemplos], return_inverse=True)
+    return y.astype(np.int64), [str(c) for c in clases]
+
+def id3(ejemplos, atributos, nivel=0, clase="Jugar", **opciones):
+    """Árbol ID3 a partir de una lista de ejemplos (diccionarios atributo -> valor).
+
+    `nivel` es la profundidad de la raíz, como en la recursión original, y
+    cuenta para `max_profundidad`. Las demás opciones son las de `id3_codificado`.
+
+    A diferencia del original, que usaba max(set(decisiones), key=count) y
+    dependía del orden del set, un empate en la clase mayoritaria se resuelve
+    siempre a favor de la primera clase en orden alfabético.
+    """
+    X, categorias = codificar_ejemplos(ejemplos, atributos)
+    y, clases = codificar_clase(ejemplos, clase)
+    return id3_codificado(X, y, atributos, categorias, clases, profundidad=nivel, **opciones)
+
+def leer_datos(ruta_atributos='AtributosJuego.txt', ruta_datos='Juego.txt', clase="Jugar", tipos=None):
+    """Lee los datos directamente como matriz codificada.
+
+    Devuelve (atributos, X, y, categorias, clases) con la columna `clase` ya
+    separada del resto. Las categorías se ordenan alfabéticamente para que las
+    ramas del árbol salgan siempre en el mismo orden. Si `tipos` es None, las
+    columnas cuyo primer valor es un número se tratan como continuas: X pasa a
+    ser float64 (con los códigos en las categóricas) y su categoría es None.
+    """
+    with open(ruta_atributos, 'r') as f:
         line = f.readline().strip()
         atributos = [attr.strip() for attr in line.split(',')]
-    ejemplos = []
-    with open('Juego.txt', 'r') as f:
-        for line in f:
-            parts = line.strip().split(',')
-            if len(parts) == len(atributos):
-                ejemplo = {}
-                for i, attr in enumerate(atributos):
-                    ejemplo[attr] = parts[i].strip()
-                ejemplos.append(ejemplo)
-            else:
-                print("Línea mal formateada ignorada:", line)
-    return atributos, ejemplos
+    j_clase = atributos.index(clase)
+    tipos = list(tipos) if tipos is not None else detectar_tipos(ruta_datos)[:len(atributos)]
+    tipos[j_clase] = 'cat'
+    columnas, valores = cargar_csv(ruta_datos, tipos=tipos)
+    codigos = []
+    categorias = []
+    for col, vals in zip(columnas, valores):
+        if vals is None:
+            codigos.append(col)
+            categorias.append(None)
+            continue
+        orden = np.argsort(vals)
+        recodificar = np.empty(len(vals), dtype=np.int32)
+        recodificar[orden] = np.arange(len(vals), dtype=np.int32)
+        codigos.append(recodificar[col])
+        categorias.append([vals[i] for i in orden])
+    resto = [j for j in range(len(atributos)) if j != j_clase]
+    tipo = np.int32 if all(tipos[j] == 'cat' for j in resto) else np.float64
+    X = np.empty((len(codigos[j_clase]), len(resto)), dtype=tipo, order='F')
+    for k, j in enumerate(resto):
+        X[:, k] = codigos[j]
+    y = codigos[j_clase].astype(np.int64)
+    return [atributos[j] for j in resto], X, y, [categorias[j] for j in resto], categorias[j_clase]
 
 # ============================
 # Visualización con Pygame
 # ============================
 
-def compute_layout_with_labels(tree, depth=0, positions=None, edges=None, labels=None, x_counter=None):
-    if positions is None:
-        positions = {}
-    if edges is None:
-        edges = []
-    if labels is None:
-        labels = {}
-    if x_counter is None:
-        x_counter = [0]
-    # Si el nodo es una hoja (no es diccionario), asignamos posición basada en el contador.
-    if not isinstance(tree, dict):
-        node_id = f"leaf_{x_counter[0]}"
-        positions[node_id] = (x_counter[0], depth)
-        labels[node_id] = str(tree)
-        x_counter[0] += 1
-        return positions[node_id], node_id, labels, edges
-    else:
-        attribute = list(tree.keys())[0]
-        node_id = f"node_{attribute}_{depth}_{x_counter[0]}"
-        child_positions = []
-        for branch_label, subtree in tree[attribute].items():
-            child_pos, child_id, labels, edges = compute_layout_with_labels(
-                subtree, depth + 1, positions, edges, labels, x_counter)
-            edges.append((node_id, child_id, branch_label))
-            child_positions.append(child_pos)
-        avg_x = sum(pos[0] for pos in child_positions) / len(child_positions) if child_positions else x_counter[0]
-        positions[node_id] = (avg_x, depth)
-        labels[node_id] = attribute
-        return positions[node_id], node_id, labels, edges
+def compute_layout(tree):
+    """Posición de cada nodo con ids enteros.
+
+    Las hojas ocupan columnas consecutivas y cada nodo interno se centra sobre
+    sus hijos. Devuelve (x, profundidad, etiquetas, es_hoja, aristas), con x y
+    profundidad como arrays y aristas como lista de (padre, hijo, etiqueta_rama).
+    """
+    xs, profundidades, etiquetas, hojas, aristas = [], [], [], [], []
+    siguiente_hoja = 0
+
+    def visitar(nodo, profundidad):
+        nonlocal siguiente_hoja
+        i = len(xs)
+        xs.append(0.0)
+        profundidades.append(profundidad)
+        if not isinstance(nodo, dict):
+            xs[i] = siguiente_hoja
+            siguiente_hoja += 1
+            etiquetas.append(str(nodo))
+            hojas.append(True)
+            return i
+        ((atributo, ramas),) = nodo.items()
+        etiquetas.append(atributo)
+        hojas.append(False)
+        hijos = []
+        for etiqueta_rama, subtree in ramas.items():
+            h = visitar(subtree, profundidad + 1)
+            aristas.append((i, h, str(etiqueta_rama)))
+            hijos.append(h)
+        xs[i] = sum(xs[h] for h in hijos) / len(hijos)
+        return i
+
+    visitar(tree, 0)
+    return (np.array(xs, dtype=np.float64), np.array(profundidades, dtype=np.float64),
+            etiquetas, np.array(hojas, dtype=bool), aristas)
 
 def draw_gradient_background(screen, width, height, start_color, end_color):
     """Dibuja un degradado vertical en el fondo."""
+    import pygame
     for y in range(height):
         ratio = y / height
         r = int(start_color[0] * (1 - ratio) + end_color[0] * ratio)
@@ -115,6 +450,15 @@ def draw_gradient_background(screen, width, height, start_color, end_color):
         pygame.draw.line(screen, (r, g, b), (0, y), (width, y))
 
 def visualize_tree_pygame(tree):
+    """Muestra el árbol; rueda del ratón para zoom, arrastrar o flechas para mover, R para reiniciar la vista.
+
+    El fondo, los sprites de los nodos y los textos se generan una sola vez.
+    La capa estática (aristas, nodos y etiquetas visibles) sólo se vuelve a
+    dibujar al mover o ampliar la vista; en cada fotograma se copia entera y
+    encima se pinta únicamente el resaltado del nodo bajo el ratón.
+    """
+    # pygame sólo hace falta para dibujar; el resto del módulo funciona sin él
+    import pygame
     pygame.init()
     width, height = 1200, 800
     screen = pygame.display.set_mode((width, height))
@@ -122,22 +466,16 @@ def visualize_tree_pygame(tree):
     clock = pygame.time.Clock()
 
     # Calcular layout del árbol.
-    positions = {}
-    edges = []
-    labels = {}
-    x_counter = [0]
-    _, root_id, labels, edges = compute_layout_with_labels(tree, positions=positions, edges=edges, labels=labels, x_counter=x_counter)
-
-    max_depth = max(y for (_, y) in positions.values())
-    max_x = max(x for (x, y) in positions.values())
+    x, profundidad, labels, es_hoja, edges = compute_layout(tree)
+    padres = np.array([e[0] for e in edges], dtype=np.int64)
+    hijos = np.array([e[1] for e in edges], dtype=np.int64)
+
+    max_depth = profundidad.max()
+    max_x = x.max()
     margin = 70
     x_spacing = (width - 2 * margin) / (max_x + 1) if max_x > 0 else 100
     y_spacing = (height - 2 * margin) / (max_depth + 1) if max_depth > 0 else 100
 
-    def to_screen(pos):
-        x, y = pos
-        return int(margin + x * x_spacing), int(margin + y * y_spacing)
-
     font = pygame.font.SysFont("Arial", 16, bold=True)
     title_font = pygame.font.SysFont("Arial", 28, bold=True)
 
@@ -148,57 +486,144 @@ def visualize_tree_pygame(tree):
     line_color = (80, 80, 80)
     hover_color = (255, 215, 0)      # Dorado para resaltar
 
+    # Recursos que no cambian nunca.
+    fondo = pygame.Surface((width, height))
+    draw_gradient_background(fondo, width, height, bg_start, bg_end)
+    title_text = title_font.render("Árbol de Decisión", True, (10, 10, 10))
+    glifos = {}
+    sprites = {}
+
+    def glifo(texto, color):
+        """Texto renderizado una vez; las etiquetas de nodo llevan su sombra incluida."""
+        clave = (texto, color)
+        if clave not in glifos:
+            frente = font.render(texto, True, color)
+            if color == (255, 255, 255):
+                superficie = pygame.Surface((frente.get_width() + 1, frente.get_height() + 1), pygame.SRCALPHA)
+                superficie.blit(font.render(texto, True, (0, 0, 0)), (1, 1))
+                superficie.blit(frente, (0, 0))
+                frente = superficie
+            glifos[clave] = frente
+        return glifos[clave]
+
+    def sprite(radio, hoja):
+        """Nodo con sombra y borde para un radio dado."""
+        clave = (radio, hoja)
+        if clave not in sprites:
+            lado = 2 * radio + 8
+            superficie = pygame.Surface((lado, lado), pygame.SRCALPHA)
+            centro = radio + 2
+            pygame.draw.circle(superficie, (0, 0, 0, 100), (centro + 3, centro + 3), radio + 2)
+            pygame.draw.circle(superficie, leaf_color if hoja else internal_color, (centro, centro), radio)
+            pygame.draw.circle(superficie, (0, 0, 0), (centro, centro), radio, 3 if radio >= 8 else 1)
+            sprites[clave] = (superficie, centro)
+        return sprites[clave]
+
+    # Vista: escala y desplazamiento en píxeles.
+    vista = {"zoom": 1.0, "dx": float(margin), "dy": float(margin)}
+    capa = pygame.Surface((width, height))
+    visibles = np.empty(0, dtype=np.int64)
+    pantalla_x = pantalla_y = np.empty(0)
+    radio = 20
+
+    def dibujar_capa_estatica():
+        nonlocal visibles, pantalla_x, pantalla_y, radio
+        zoom = vista["zoom"]
+        sx = vista["dx"] + x * x_spacing * zoom
+        sy = vista["dy"] + profundidad * y_spacing * zoom
+        # Con poco espacio entre hojas los nodos se encogen y se omiten los textos.
+        separacion = min(x_spacing, y_spacing) * zoom
+        radio = 20 if separacion >= 50 else max(2, int(separacion * 0.4))
+        con_texto = radio >= 12
+
+        capa.blit(fondo, (0, 0))
+        # Aristas cuyo rectángulo envolvente toca la ventana.
+        if len(edges):
+            x0, x1 = sx[padres], sx[hijos]
+            y0, y1 = sy[padres], sy[hijos]
+            en_vista = ((np.maximum(x0, x1) >= 0) & (np.minimum(x0, x1) <= width)
+                        & (np.maximum(y0, y1) >= 0) & (np.minimum(y0, y1) <= height))
+            for e in np.flatnonzero(en_vista):
+                inicio = (int(x0[e]), int(y0[e]))
+                fin = (int(x1[e]), int(y1[e]))
+                # Con el árbol alejado el antialiasing no se aprecia y cuesta mucho más
+                if con_texto:
+                    pygame.draw.aaline(capa, line_color, inicio, fin)
+                    capa.blit(glifo(edges[e][2], (200, 0, 0)), ((inicio[0] + fin[0]) // 2, (inicio[1] + fin[1]) // 2))
+                else:
+                    pygame.draw.line(capa, line_color, inicio, fin)
+
+        # Nodos dentro de la ventana.
+        visibles = np.flatnonzero((sx >= -radio) & (sx <= width + radio) & (sy >= -radio) & (sy <= height + radio))
+        pantalla_x = sx[visibles].astype(np.int64)
+        pantalla_y = sy[visibles].astype(np.int64)
+        for i, px, py in zip(visibles.tolist(), pantalla_x.tolist(), pantalla_y.tolist()):
+            superficie, centro = sprite(radio, bool(es_hoja[i]))
+            capa.blit(superficie, (px - centro, py - centro))
+            if con_texto:
+                texto = glifo(labels[i], (255, 255, 255))
+                capa.blit(texto, texto.get_rect(center=(px, py)))
+
+        capa.blit(title_text, (width // 2 - title_text.get_width() // 2, 10))
+
+    def reiniciar_vista():
+        vista.update(zoom=1.0, dx=float(margin), dy=float(margin))
+
+    def ampliar(factor, centro):
+        vista["zoom"] *= factor
+        vista["dx"] = centro[0] - (centro[0] - vista["dx"]) * factor
+        vista["dy"] = centro[1] - (centro[1] - vista["dy"]) * factor
+
+    capa_sucia = True
+    resaltado_anterior = None
+    arrastrando = False
     running = True
     while running:
         mouse_pos = pygame.mouse.get_pos()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.MOUSEWHEEL:
+                ampliar(1.15 ** event.y, mouse_pos)
+                capa_sucia = True
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                arrastrando = True
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                arrastrando = False
+            elif event.type == pygame.MOUSEMOTION and arrastrando:
+                vista["dx"] += event.rel[0]
+                vista["dy"] += event.rel[1]
+                capa_sucia = True
+            elif event.type == pygame.KEYDOWN:
+                pasos = {pygame.K_LEFT: (100, 0), pygame.K_RIGHT: (-100, 0),
+                         pygame.K_UP: (0, 100), pygame.K_DOWN: (0, -100)}
+                if event.key in pasos:
+                    vista["dx"] += pasos[event.key][0]
+                    vista["dy"] += pasos[event.key][1]
+                    capa_sucia = True
+                elif event.key == pygame.K_r:
+                    reiniciar_vista()
+                    capa_sucia = True
 
-        # Fondo degradado.
-        draw_gradient_background(screen, width, height, bg_start, bg_end)
-
-        # Dibujar título.
-        title_text = title_font.render("Árbol de Decisión", True, (10, 10, 10))
-        screen.blit(title_text, (width // 2 - title_text.get_width() // 2, 10))
-
-        # Dibujar conexiones (edges).
-        for parent_id, child_id, branch_label in edges:
-            parent_pos = to_screen(positions[parent_id])
-            child_pos = to_screen(positions[child_id])
-            pygame.draw.aaline(screen, line_color, parent_pos, child_pos, 2)
-            mid_x = (parent_pos[0] + child_pos[0]) // 2
-            mid_y = (parent_pos[1] + child_pos[1]) // 2
-            edge_text = font.render(str(branch_label), True, (200, 0, 0))
-            screen.blit(edge_text, (mid_x, mid_y))
-
-        # Dibujar nodos.
-        for node_id, pos in positions.items():
-            screen_pos = to_screen(pos)
-            # Resaltar si el mouse está cerca.
-            dist = math.hypot(screen_pos[0] - mouse_pos[0], screen_pos[1] - mouse_pos[1])
-            highlight = dist < 25
-            if node_id.startswith("leaf"):
-                fill_color = leaf_color
-            else:
-                fill_color = internal_color
-
-            # Dibujar sombra con alfa.
-            shadow_surface = pygame.Surface((44, 44), pygame.SRCALPHA)
-            pygame.draw.circle(shadow_surface, (0, 0, 0, 100), (22, 22), 22)
-            screen.blit(shadow_surface, (screen_pos[0] - 22 + 3, screen_pos[1] - 22 + 3))
-            # Dibujar el nodo.
-            pygame.draw.circle(screen, fill_color, screen_pos, 20)
-            border_color = hover_color if highlight else (0, 0, 0)
-            pygame.draw.circle(screen, border_color, screen_pos, 20, 3)
-            # Dibujar etiqueta con sombra.
-            label_text = font.render(labels[node_id], True, (255, 255, 255))
-            shadow_text = font.render(labels[node_id], True, (0, 0, 0))
-            text_rect = label_text.get_rect(center=screen_pos)
-            screen.blit(shadow_text, (text_rect.x+1, text_rect.y+1))
-            screen.blit(label_text, text_rect)
-
-        pygame.display.flip()
+        if capa_sucia:
+            dibujar_capa_estatica()
+
+        # Resaltar el nodo visible más cercano al ratón.
+        resaltado = None
+        if len(visibles):
+            dist2 = (pantalla_x - mouse_pos[0]) ** 2 + (pantalla_y - mouse_pos[1]) ** 2
+            k = int(np.argmin(dist2))
+            if dist2[k] < (radio + 5) ** 2:
+                resaltado = k
+
+        if capa_sucia or resaltado != resaltado_anterior:
+            screen.blit(capa, (0, 0))
+            if resaltado is not None:
+                centro = (int(pantalla_x[resaltado]), int(pantalla_y[resaltado]))
+                pygame.draw.circle(screen, hover_color, centro, radio, 3 if radio >= 8 else 1)
+            pygame.display.flip()
+            capa_sucia = False
+            resaltado_anterior = resaltado
         clock.tick(30)
 
     pygame.quit()
@@ -208,11 +633,39 @@ def visualize_tree_pygame(tree):
 # Código Principal
 # ============================
 
+# Columna con la decisión que se quiere predecir
+CLASE = "Jugar"
+# Límites de crecimiento (None / 2 / 0.0 dejan crecer el árbol completo)
+MAX_PROFUNDIDAD = None
+MIN_FILAS_DIVISION = 2
+MIN_GANANCIA = 0.0
+# Fracción de filas reservada para la poda por error reducido (0 = sin poda)
+FRACCION_VALIDACION = 0.0
+
 if __name__ == '__main__':
-    atributos, ejemplos = leer_datos()
-    # Excluir el atributo de clase "Jugar" para construir el árbol.
-    atributos_sin_clase = [attr for attr in atributos if attr != "Jugar"]
-    tree = id3(ejemplos, atributos_sin_clase, nivel=0)  # Árbol completo
+    atributos, X, y, categorias, clases = leer_datos(os.path.join(CARPETA, 'AtributosJuego.txt'),
+                                                     os.path.join(CARPETA, 'Juego.txt'), clase=CLASE)
+    X_val, y_val = X[:0], y[:0]
+    if FRACCION_VALIDACION > 0:
+        orden = np.random.default_rng(0).permutation(len(y))
+        corte = int(len(y) * (1 - FRACCION_VALIDACION))
+        X_val, y_val = X[orden[corte:]], y[orden[corte:]]
+        X, y = np.asfortranarray(X[orden[:corte]]), y[orden[:corte]]
+    inicio = time.perf_counter()
+    niveles = []
+    tree = id3_codificado(X, y, atributos, categorias, clases, max_profundidad=MAX_PROFUNDIDAD,
+                          min_filas_division=MIN_FILAS_DIVISION, min_ganancia=MIN_GANANCIA, estadisticas=niveles)
+    print(f"Construcción: {contar_nodos(tree)} nodos en {time.perf_counter() - inicio:.3f} s")
+    for nivel in niveles:
+        print(f"  nivel {nivel['profundidad']}: {nivel['nodos']} nodos ({nivel['hojas']} hojas), "
+              f"{nivel['evaluaciones_ganancia']} ganancias evaluadas, {nivel['tiempo_s']:.4f} s")
+    if len(y_val):
+        tree = podar_error_reducido(tree, X, y, X_val, y_val, atributos, categorias, clases)
+        compilado = ArbolCompilado.compilar(tree, atributos, categorias, clases, X, y)
+        print(f"Tras la poda: {contar_nodos(tree)} nodos, aciertos en validación "
+              f"{float(np.mean(compilado.predecir(X_val) == y_val)):.3f}")
     print("Árbol de decisión:")
     print(tree)
+    compilado = ArbolCompilado.compilar(tree, atributos, categorias, clases, X, y)
+    print("Aciertos en entrenamiento:", float(np.mean(compilado.predecir(X) == y)))
     visualize_tree_pygame(tree)
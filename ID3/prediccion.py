@@ -0,0 +1,187 @@
+from collections import Counter, deque
+
+import numpy as np
+
+# ============================
+# Árbol ID3 compilado a arrays planos
+# ============================
+
+
+class ArbolCompilado:
+    """Árbol de `id3` guardado como arrays para clasificar lotes enteros con NumPy.
+
+    Cada nodo i tiene `atributo[i]` (columna de X, -1 en las hojas), `inicio[i]`
+    (posición de su primer hijo en `hijos`, indexada por el código de la
+    categoría) y `clase[i]` (código de la clase de la hoja). Las ramas que no
+    aparecieron al entrenar y los códigos desconocidos van a `respaldo[i]`, una
+    hoja con la clase mayoritaria de las filas de entrenamiento que llegan al
+    nodo (la misma que usa `podar_error_reducido`).
+
+    Los nodos de atributos continuos (categoría None) guardan su corte en
+    `umbral[i]` (nan en los demás) y tienen dos hijos: `<= t` y `> t`; los
+    valores NaN bajan por `> t`, igual que al entrenar.
+    """
+
+    def __init__(self, atributo, inicio, hijos, clase, respaldo, umbral, atributos, categorias, clases):
+        self.atributo = atributo
+        self.inicio = inicio
+        self.hijos = hijos
+        self.clase = clase
+        self.respaldo = respaldo
+        self.umbral = umbral
+        self.atributos = list(atributos)
+        self.categorias = [None if c is None else list(c) for c in categorias]
+        self.clases = list(clases)
+        self.cardinalidad = np.array([2 if c is None else len(c) for c in self.categorias], dtype=np.int64)
+
+    @classmethod
+    def compilar(cls, arbol, atributos, categorias, clases, X=None, y=None):
+        """Convierte el diccionario anidado de `id3` recorriéndolo por niveles.
+
+        Con los datos de entrenamiento (X, y) el respaldo de cada nodo es la
+        clase mayoritaria de sus filas (la del padre si no le llega ninguna),
+        igual que en `podar_error_reducido`. Sin ellos se aproxima con la
+        mayoría de las hojas del subárbol.
+        """
+        columna = {a: j for j, a in enumerate(atributos)}
+        codigo_clase = {c: k for k, c in enumerate(clases)}
+        n_clases = len(clases)
+        atributo, inicio, clase, respaldo, umbral, hijos = [], [], [], [], [], []
+
+        def nuevo_nodo():
+            atributo.append(-1)
+            inicio.append(-1)
+            clase.append(-1)
+            respaldo.append(-1)
+            umbral.append(np.nan)
+            return len(atributo) - 1
+
+        # Recuento de hojas por clase de cada subárbol, en una sola pasada
+        recuentos = {}
+
+        def contar_hojas(nodo):
+            if not isinstance(nodo, dict):
+                return Counter([nodo])
+            ((_, ramas),) = nodo.items()
+            total = Counter()
+            for sub in ramas.values():
+                total.update(contar_hojas(sub))
+            recuentos[id(nodo)] = total
+            return total
+
+        if X is None:
+            contar_hojas(arbol)
+            filas_raiz, mayoria_raiz = None, None
+        else:
+            X, y = np.asarray(X), np.asarray(y)
+            filas_raiz = np.arange(len(y))
+            mayoria_raiz = int(np.argmax(np.bincount(y, minlength=n_clases)))
+        pendientes = deque([(arbol, nuevo_nodo(), filas_raiz, mayoria_raiz)])
+        while pendientes:
+            nodo, i, filas, mayoria = pendientes.popleft()
+            if not isinstance(nodo, dict):
+                clase[i] = codigo_clase[nodo]
+                continue
+            ((nombre, ramas),) = nodo.items()
+            j = columna[nombre]
+            atributo[i] = j
+            if filas is None:
+                mayoria = codigo_clase[recuentos[id(nodo)].most_common(1)[0][0]]
+            elif len(filas):
+                mayoria = int(np.argmax(np.bincount(y[filas], minlength=n_clases)))
+            respaldo[i] = nuevo_nodo()
+            clase[respaldo[i]] = mayoria
+            inicio[i] = len(hijos)
+            if categorias[j] is None:
+                # Ramas "<= t" y "> t": el código es 0 o 1 según la comparación (NaN va por "> t")
+                umbral[i] = float(next(iter(ramas)).split(' ', 1)[1])
+                codigo = {clave: 0 if clave.startswith('<=') else 1 for clave in ramas}
+                hijos.extend([respaldo[i]] * 2)
+                if filas is not None:
+                    codigos = (~(X[filas, j] <= umbral[i])).astype(np.int64)
+            else:
+                codigo = {v: k for k, v in enumerate(categorias[j])}
+                hijos.extend([respaldo[i]] * len(categorias[j]))
+                if filas is not None:
+                    codigos = X[filas, j].astype(np.int64)
+            for valor, sub in ramas.items():
+                hijo = nuevo_nodo()
+                hijos[inicio[i] + codigo[valor]] = hijo
+                sub_filas = None if filas is None else filas[codigos == codigo[valor]]
+                pendientes.append((sub, hijo, sub_filas, mayoria))
+
+        return cls(np.array(atributo, dtype=np.int32), np.array(inicio, dtype=np.int64),
+                   np.array(hijos, dtype=np.int32), np.array(clase, dtype=np.int32),
+                   np.array(respaldo, dtype=np.int32), np.array(umbral, dtype=np.float64),
+                   atributos, categorias, clases)
+
+    @property
+    def n_nodos(self):
+        return len(self.atributo)
+
+    def predecir(self, X):
+        """Códigos de clase para cada fila de X (matriz codificada como en `leer_datos`).
+
+        Todas las filas bajan a la vez un nivel por iteración; las que llegan a
+        una hoja salen del conjunto activo.
+        """
+        X = np.asarray(X)
+        nodo = np.zeros(X.shape[0], dtype=np.int32)
+        activas = np.arange(X.shape[0])
+        while len(activas):
+            actual = nodo[activas]
+            columnas = self.atributo[actual]
+            internas = columnas >= 0
+            activas, actual, columnas = activas[internas], actual[internas], columnas[internas]
+            if not len(activas):
+                break
+            valores = X[activas, columnas]
+            cortes = self.umbral[actual]
+            continuas = ~np.isnan(cortes)
+            if continuas.any():
+                valores = np.where(continuas, ~(valores <= cortes), valores)
+            codigos = valores.astype(np.int64)
+            validos = (codigos >= 0) & (codigos < self.cardinalidad[columnas])
+            posicion = self.inicio[actual] + np.where(validos, codigos, 0)
+            nodo[activas] = np.where(validos, self.hijos[posicion], self.respaldo[actual])
+        return self.clase[nodo]
+
+    def predecir_nombres(self, X):
+        return np.asarray(self.clases, dtype=object)[self.predecir(X)]
+
+    def codificar(self, filas):
+        """Codifica una lista de diccionarios {atributo: valor}; los valores nuevos quedan en -1.
+
+        Los atributos continuos se copian como float (nan si faltan).
+        """
+        continuo = any(c is None for c in self.categorias)
+        X = np.full((len(filas), len(self.atributos)), -1, dtype=np.float64 if continuo else np.int32)
+        for j, (nombre, valores) in enumerate(zip(self.atributos, self.categorias)):
+            if valores is None:
+                X[:, j] = [float(fila.get(nombre, 'nan')) for fila in filas]
+                continue
+            codigo = {v: k for k, v in enumerate(valores)}
+            X[:, j] = [codigo.get(str(fila.get(nombre, '')).strip(), -1) for fila in filas]
+        return X
+
+    def guardar(self, ruta):
+        """Guarda el árbol en un .npz sin objetos de Python (se carga sin pickle)."""
+        np.savez(ruta, atributo=self.atributo, inicio=self.inicio, hijos=self.hijos,
+                 clase=self.clase, respaldo=self.respaldo, umbral=self.umbral,
+                 atributos=np.array(self.atributos, dtype=str),
+                 clases=np.array(self.clases, dtype=str),
+                 valores=np.array([v for c in self.categorias if c is not None for v in c], dtype=str),
+                 continuo=np.array([c is None for c in self.categorias], dtype=bool),
+                 n_valores=np.array([0 if c is None else len(c) for c in self.categorias], dtype=np.int64))
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as datos:
+            n_valores = datos['n_valores']
+            cortes = np.cumsum(n_valores)[:-1]
+            partes = np.split(datos['valores'], cortes)[:len(n_valores)]
+            valores = [None if continuo else list(map(str, parte))
+                       for parte, continuo in zip(partes, datos['continuo'])]
+            return cls(datos['atributo'], datos['inicio'], datos['hijos'], datos['clase'],
+                       datos['respaldo'], datos['umbral'], list(map(str, datos['atributos'])),
+                       valores, list(map(str, datos['clases'])))
@@ -0,0 +1,344 @@
+"""Benchmarks sin interfaz gráfica de los tres proyectos (A*, ID3 y practica3).
+
+Uso:
+    python benchmark.py                          # todos los escenarios, resultados en benchmark.json
+    python benchmark.py --modulo a_estrella --rapido
+    python benchmark.py --salida nuevo.json --base base.json --tolerancia 0.15
+
+Cada escenario se ejecuta `--repeticiones` veces para medir el tiempo (se
+guarda el mínimo y la mediana) y una vez más con tracemalloc para el pico de
+memoria. Con `--base` se compara contra un JSON anterior y se marca como
+regresión todo escenario cuyo tiempo mínimo empeore más de la tolerancia; en
+ese caso el proceso termina con código 1.
+No se incluye ninguna base en el repositorio, porque los tiempos dependen de la
+máquina. Hay que grabarla antes en el mismo equipo con `--salida base.json`.
+
+El módulo `referencia` mide por parejas el código original (referencia.py)
+y el actual sobre los mismos datos, y añade la aceleración obtenida.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+
+def _cargar_modulo(nombre, ruta):
+    """Importa un script por su ruta (A_Estrella y los clasificadores no son paquetes; ID3 sí)."""
+    carpeta = os.path.dirname(ruta)
+    if carpeta not in sys.path:
+        sys.path.insert(0, carpeta)
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# ============================
+# Escenarios
+# ============================
+
+def escenarios_a_estrella(rapido):
+    busqueda = _cargar_modulo('busqueda', os.path.join(RAIZ, 'A_Estrella', 'busqueda.py'))
+    variantes = _cargar_modulo('variantes', os.path.join(RAIZ, 'A_Estrella', 'variantes.py'))
+    incremental = _cargar_modulo('incremental', os.path.join(RAIZ, 'A_Estrella', 'incremental.py'))
+    mapas = _cargar_modulo('mapas', os.path.join(RAIZ, 'A_Estrella', 'mapas.py'))
+    algoritmos = {
+        "a_estrella": busqueda.a_estrella,
+        "jps": variantes.a_estrella_jps,
+        "bidireccional": variantes.a_estrella_bidireccional,
+        "ara": lambda c, a, b: variantes.a_estrella_anytime(c, a, b, tiempo_max=float('inf'))[0],
+        "dstar_lite": lambda c, a, b: incremental.DStarLite(c, a, b).camino(),
+    }
+    lado = 60 if rapido else 200
+    for algoritmo, buscar in algoritmos.items():
+        for densidad in (0.1, 0.3):
+            parametros = {"filas": lado, "columnas": lado, "densidad": densidad, "waypoints": 3,
+                          "semilla": 1, "algoritmo": algoritmo}
+
+            def preparar(p=parametros):
+                cuadricula = mapas.generar_mapa(p["filas"], p["columnas"], p["semilla"], p_obstaculo=p["densidad"])
+                libres = np.flatnonzero(cuadricula.bloqueado == 0)
+                rng = np.random.default_rng(p["semilla"])
+                puntos = [cuadricula.posicion(int(i)) for i in rng.choice(libres, p["waypoints"] + 2, replace=False)]
+                return cuadricula, puntos
+
+            def ejecutar(datos, buscar=buscar):
+                cuadricula, puntos = datos
+                return sum(buscar(cuadricula, a, b) is not None for a, b in zip(puntos[:-1], puntos[1:]))
+
+            yield (f"a_estrella/{algoritmo}/{lado}x{lado}/d{densidad}", "a_estrella", parametros,
+                   preparar, ejecutar, parametros["waypoints"] + 1, "tramos/s")
+
+
+def escenarios_id3(rapido):
+    ID3 = importlib.import_module('ID3.ID3')
+    prediccion = importlib.import_module('ID3.prediccion')
+    tamanos = [(5000, 8, 3)] if rapido else [(50000, 10, 3), (200000, 20, 4), (20000, 50, 8)]
+    for filas, atributos, cardinalidad in tamanos:
+        parametros = {"filas": filas, "atributos": atributos, "cardinalidad": cardinalidad, "semilla": 0}
+
+        def preparar(p=parametros):
+            rng = np.random.default_rng(p["semilla"])
+            X = np.asfortranarray(rng.integers(0, p["cardinalidad"], (p["filas"], p["atributos"])).astype(np.int32))
+            # La clase depende de tres atributos más un 10 % de ruido
+            y = (X[:, 0] + X[:, 1] * X[:, 2]) % 2
+            y = np.where(rng.random(p["filas"]) < 0.1, 1 - y, y).astype(np.int64)
+            nombres = [f"a{j}" for j in range(p["atributos"])]
+            categorias = [[str(v) for v in range(p["cardinalidad"])]] * p["atributos"]
+            return X, y, nombres, categorias, ["no", "si"]
+
+        def construir(datos):
+            return ID3.id3_codificado(*datos, max_profundidad=8)
+
+        def predecir(datos):
+            X, y, nombres, categorias, clases = datos
+            arbol = prediccion.ArbolCompilado.compilar(ID3.id3_codificado(*datos, max_profundidad=8),
+                                                      nombres, categorias, clases, X, y)
+            return arbol.predecir(X)
+
+        nombre = f"{filas}x{atributos}x{cardinalidad}"
+        yield f"id3/construir/{nombre}", "id3", parametros, preparar, construir, filas, "filas/s"
+        yield f"id3/construir_y_predecir/{nombre}", "id3", parametros, preparar, predecir, filas, "filas/s"
+
+
+def escenarios_practica3(rapido):
+    p3 = _cargar_modulo('practica3', os.path.join(RAIZ, 'Algoritmos de Clasificacion', 'practica3.py'))
+    tamanos = [(5000, 4, 2)] if rapido else [(100000, 4, 2), (100000, 16, 8), (20000, 64, 32)]
+    for n, d, k in tamanos:
+        parametros = {"n": n, "d": d, "k": k, "semilla": 0}
+
+        def preparar(p=parametros):
+            rng = np.random.default_rng(p["semilla"])
+            centros = rng.normal(0, 5, (p["k"], p["d"]))
+            y = rng.integers(0, p["k"], p["n"])
+            X = centros[y] + rng.normal(0, 1, (p["n"], p["d"]))
+            return X, y
+
+        funciones = {
+            "bayes_predict": lambda datos: p3.bayes_predict(datos[0], p3.bayes_train(*datos)),
+            "fuzzy_kmeans": lambda datos, k=k: p3.fuzzy_kmeans(datos[0], k, max_iter=20),
+            "lloyd": lambda datos, k=k: p3.lloyd(datos[0], k, max_iter=5, batch=256),
+            # La llamada por defecto (muestra a muestra), que es la que usa el script
+            "lloyd_por_defecto": lambda datos, k=k: p3.lloyd(datos[0], k),
+        }
+        for nombre, funcion in funciones.items():
+            yield (f"practica3/{nombre}/{n}x{d}x{k}", "practica3", parametros, preparar, funcion, n, "filas/s")
+
+    # KD-tree sobre muchos centroides, con duplicados (empates exactos); antes de medir se
+    # comprueba que da las mismas etiquetas que la búsqueda exhaustiva
+    n, d, k = (5000, 3, 2 * p3.KD_MIN_K) if rapido else (100000, 4, 4 * p3.KD_MIN_K)
+    parametros = {"n": n, "d": d, "k": k, "semilla": 0}
+
+    def preparar_kd(p=parametros):
+        rng = np.random.default_rng(p["semilla"])
+        centroides = rng.normal(0, 5, (p["k"] // 2, p["d"]))
+        centroides = np.vstack([centroides, centroides[rng.permutation(len(centroides))]])
+        # Puntos casi encima de los centroides: ahí la cota del KD-tree es del orden del redondeo
+        cerca = centroides + rng.normal(0, 1e-9, centroides.shape)
+        X = np.vstack([rng.normal(0, 5, (p["n"] - 2 * len(centroides), p["d"])), centroides, cerca])
+        exhaustiva = p3.assign(X, centroides)[0]
+        for hojas in (4, 32):
+            if not np.array_equal(p3.CentroidIndex(centroides, leaf_size=hojas).query(X)[0], exhaustiva):
+                raise AssertionError(f"CentroidIndex(leaf_size={hojas}) no coincide con la búsqueda exhaustiva")
+        return X, centroides, p3.CentroidIndex(centroides)
+
+    yield (f"practica3/assign_kd/{n}x{d}x{k}", "practica3", parametros, preparar_kd,
+           lambda datos: p3.assign(*datos[:2], index=datos[2]), n, "filas/s")
+
+
+def escenarios_referencia(rapido):
+    """Parejas original/actual sobre los mismos datos, con el código de partida de referencia.py.
+
+    Los tamaños son los que el código original termina en un tiempo razonable.
+    El escenario `.../actual` recibe en el JSON su `aceleracion` respecto al original.
+    """
+    referencia = _cargar_modulo('referencia', os.path.join(RAIZ, 'referencia.py'))
+    busqueda = _cargar_modulo('busqueda', os.path.join(RAIZ, 'A_Estrella', 'busqueda.py'))
+    mapas = _cargar_modulo('mapas', os.path.join(RAIZ, 'A_Estrella', 'mapas.py'))
+    ID3 = importlib.import_module('ID3.ID3')
+    p3 = _cargar_modulo('practica3', os.path.join(RAIZ, 'Algoritmos de Clasificacion', 'practica3.py'))
+
+    def pareja(nombre, parametros, preparar, original, actual, unidades, unidad):
+        yield f"referencia/{nombre}/original", "referencia", parametros, preparar, original, unidades, unidad
+        yield f"referencia/{nombre}/actual", "referencia", parametros, preparar, actual, unidades, unidad
+
+    # A*: simulación original (20 % de obstáculos, 10 % de celdas peligrosas) con 3 waypoints
+    lado = 40 if rapido else 100
+    parametros = {"filas": lado, "columnas": lado, "densidad": 0.2, "waypoints": 3, "semilla": 1}
+
+    def preparar_a_estrella(p=parametros):
+        cuadricula = mapas.generar_mapa(p["filas"], p["columnas"], p["semilla"], p_obstaculo=p["densidad"])
+        libres = np.flatnonzero(cuadricula.bloqueado == 0)
+        rng = np.random.default_rng(p["semilla"])
+        puntos = [cuadricula.posicion(int(i)) for i in rng.choice(libres, p["waypoints"] + 2, replace=False)]
+        obstaculos = [cuadricula.posicion(int(i)) for i in np.flatnonzero(cuadricula.bloqueado)]
+        peligrosas = {cuadricula.posicion(int(i)): float(cuadricula.riesgo[i]) for i in np.flatnonzero(cuadricula.riesgo)}
+        return cuadricula, puntos, obstaculos, peligrosas
+
+    def a_estrella_original(datos):
+        cuadricula, puntos, obstaculos, peligrosas = datos
+        return [referencia.algoritmo_a_estrella(cuadricula.filas, cuadricula.columnas, obstaculos, peligrosas, a, b)
+                for a, b in zip(puntos[:-1], puntos[1:])]
+
+    def a_estrella_actual(datos):
+        cuadricula, puntos = datos[:2]
+        return [busqueda.a_estrella(cuadricula, a, b) for a, b in zip(puntos[:-1], puntos[1:])]
+
+    yield from pareja(f"a_estrella/{lado}x{lado}", parametros, preparar_a_estrella, a_estrella_original,
+                      a_estrella_actual, parametros["waypoints"] + 1, "tramos/s")
+
+    # ID3: árbol completo sobre ejemplos como diccionarios de cadenas, la entrada del original
+    filas, atributos, cardinalidad = (1000, 6, 3) if rapido else (10000, 6, 3)
+    parametros = {"filas": filas, "atributos": atributos, "cardinalidad": cardinalidad, "semilla": 0}
+
+    def preparar_id3(p=parametros):
+        rng = np.random.default_rng(p["semilla"])
+        X = rng.integers(0, p["cardinalidad"], (p["filas"], p["atributos"]))
+        y = (X[:, 0] + X[:, 1] * X[:, 2]) % 2
+        y = np.where(rng.random(p["filas"]) < 0.1, 1 - y, y)
+        nombres = [f"a{j}" for j in range(p["atributos"])]
+        ejemplos = [dict(zip(nombres, map(str, fila)), Jugar="positivo" if c else "negativo")
+                    for fila, c in zip(X.tolist(), y.tolist())]
+        return ejemplos, nombres
+
+    yield from pareja(f"id3/{filas}x{atributos}x{cardinalidad}", parametros, preparar_id3,
+                      lambda datos: referencia.id3(*datos), lambda datos: ID3.id3(*datos, clase="Jugar"),
+                      filas, "filas/s")
+
+    # Clasificadores: dos clases gaussianas en 4 dimensiones, como Iris2Clases
+    n, d, k = (2000, 4, 2) if rapido else (20000, 4, 2)
+    parametros = {"n": n, "d": d, "k": k, "semilla": 0}
+
+    def preparar_practica3(p=parametros):
+        rng = np.random.default_rng(p["semilla"])
+        centros = rng.normal(0, 5, (p["k"], p["d"]))
+        y = rng.integers(0, p["k"], p["n"])
+        X = centros[y] + rng.normal(0, 1, (p["n"], p["d"]))
+        return X, y, X[rng.choice(p["n"], p["k"], replace=False)]
+
+    nombre = f"{n}x{d}x{k}"
+    yield from pareja(f"bayes_predict/{nombre}", parametros, preparar_practica3,
+                      lambda datos: referencia.bayes_predict(datos[0], referencia.bayes_train(*datos[:2])),
+                      lambda datos: p3.bayes_predict(datos[0], p3.bayes_train(*datos[:2])), n, "filas/s")
+    yield from pareja(f"fuzzy_kmeans/{nombre}", parametros, preparar_practica3,
+                      lambda datos, k=k: referencia.fuzzy_kmeans(datos[0], k, datos[2], max_iter=20),
+                      lambda datos, k=k: p3.fuzzy_kmeans(datos[0], k, max_iter=20, init=datos[2]), n, "filas/s")
+    # Lloyd original: 10 pasadas fijas, sin criterio de parada
+    yield from pareja(f"lloyd/{nombre}", parametros, preparar_practica3,
+                      lambda datos, k=k: referencia.lloyd(datos[0], k, datos[2], max_iter=10),
+                      lambda datos, k=k: p3.lloyd(datos[0], k, max_iter=10, tol=0, batch=256, init=datos[2]), n, "filas/s")
+    # Y contra la llamada por defecto, para no esconder una regresión del camino muestra a muestra
+    yield from pareja(f"lloyd_por_defecto/{nombre}", parametros, preparar_practica3,
+                      lambda datos, k=k: referencia.lloyd(datos[0], k, datos[2], max_iter=10),
+                      lambda datos, k=k: p3.lloyd(datos[0], k, init=datos[2]), n, "filas/s")
+
+
+ESCENARIOS = {"a_estrella": escenarios_a_estrella, "id3": escenarios_id3, "practica3": escenarios_practica3,
+              "referencia": escenarios_referencia}
+
+
+# ============================
+# Medición y comparación
+# ============================
+
+def medir(preparar, ejecutar, unidades, repeticiones):
+    datos = preparar()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        ejecutar(datos)
+        tiempos.append(time.perf_counter() - inicio)
+    # Pico de memoria en una ejecución aparte para no falsear los tiempos
+    tracemalloc.start()
+    ejecutar(datos)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mejor = min(tiempos)
+    return {"tiempo_s": mejor, "tiempo_mediana_s": statistics.median(tiempos),
+            "memoria_pico_mb": pico / 2 ** 20, "rendimiento": unidades / mejor if mejor > 0 else float('inf')}
+
+
+def comparar(resultados, base, tolerancia):
+    """Añade a cada resultado su relación con la base y devuelve los nombres con regresión."""
+    anteriores = {r["nombre"]: r for r in base.get("resultados", [])}
+    regresiones = []
+    for r in resultados:
+        anterior = anteriores.get(r["nombre"])
+        if anterior is None:
+            continue
+        r["relacion_base"] = r["tiempo_s"] / anterior["tiempo_s"]
+        if r["relacion_base"] > 1 + tolerancia:
+            regresiones.append(r["nombre"])
+    return regresiones
+
+
+def aceleraciones(resultados):
+    """Añade a cada escenario `.../actual` su aceleración respecto a `.../original`."""
+    tiempos = {r["nombre"]: r["tiempo_s"] for r in resultados}
+    for r in resultados:
+        original = r["nombre"][:-len("actual")] + "original"
+        if r["nombre"].endswith("/actual") and original in tiempos:
+            r["aceleracion"] = tiempos[original] / r["tiempo_s"]
+
+
+def entorno():
+    return {"python": platform.python_version(), "numpy": np.__version__, "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modulo", choices=sorted(ESCENARIOS), action="append",
+                        help="limitar a uno o varios módulos (por defecto todos)")
+    parser.add_argument("--filtro", default="", help="sólo escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--rapido", action="store_true", help="tamaños pequeños para una comprobación rápida")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", default="benchmark.json")
+    parser.add_argument("--base", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="empeoramiento relativo del tiempo a partir del cual hay regresión")
+    args = parser.parse_args(argumentos)
+
+    resultados = []
+    for modulo in args.modulo or sorted(ESCENARIOS):
+        for nombre, mod, parametros, preparar, ejecutar, unidades, unidad in ESCENARIOS[modulo](args.rapido):
+            if args.filtro not in nombre:
+                continue
+            medida = medir(preparar, ejecutar, unidades, args.repeticiones)
+            resultados.append({"nombre": nombre, "modulo": mod, "parametros": parametros, "unidad": unidad, **medida})
+            print(f"{nombre:55s} {medida['tiempo_s']:9.4f} s {medida['memoria_pico_mb']:9.1f} MB "
+                  f"{medida['rendimiento']:12.1f} {unidad}", flush=True)
+
+    aceleraciones(resultados)
+    for r in resultados:
+        if "aceleracion" in r:
+            print(f"{r['nombre']:55s} aceleración x{r['aceleracion']:.1f} respecto al original")
+
+    regresiones = []
+    if args.base:
+        with open(args.base, 'r') as f:
+            regresiones = comparar(resultados, json.load(f), args.tolerancia)
+        for r in resultados:
+            if "relacion_base" in r:
+                marca = "REGRESIÓN" if r["nombre"] in regresiones else ""
+                print(f"{r['nombre']:55s} x{r['relacion_base']:.2f} {marca}")
+
+    with open(args.salida, 'w') as f:
+        json.dump({"entorno": entorno(), "resultados": resultados, "regresiones": regresiones}, f, indent=2)
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import itertools
+import json
+import os
+
+import numpy as np
+
+# ============================
+# Cargador de CSV por bloques con caché en .npy
+# ============================
+
+# Versión del formato de la caché; si cambia se vuelve a leer el CSV
+VERSION_CACHE = 1
+
+
+def detectar_tipos(ruta, separador=','):
+    """'num' para los campos de la primera línea que se pueden leer como float y 'cat' para el resto."""
+    with open(ruta, 'r') as f:
+        primera = next((linea for linea in f if linea.strip()), '')
+    tipos = []
+    for campo in primera.strip().split(separador):
+        try:
+            float(campo)
+            tipos.append('num')
+        except ValueError:
+            tipos.append('cat')
+    return tipos
+
+
+def _bloques(ruta, tipos, separador, tam_bloque, estricto):
+    """Lee el fichero de `tam_bloque` en `tam_bloque` líneas y devuelve cada bloque por columnas."""
+    n = len(tipos)
+    with open(ruta, 'r') as f:
+        while True:
+            lineas = list(itertools.islice(f, tam_bloque))
+            if not lineas:
+                return
+            filas = []
+            for linea in lineas:
+                if not linea.strip():
+                    continue
+                partes = linea.strip().split(separador)
+                if len(partes) < n or (estricto and len(partes) != n):
+                    print("Línea mal formateada ignorada:", linea.rstrip())
+                    continue
+                filas.append(partes[:n])
+            if filas:
+                yield list(zip(*filas))
+
+
+def _convertir(campos, tipo, diccionario, dtype):
+    if tipo == 'num':
+        return np.array(campos, dtype=dtype)
+    return np.fromiter((diccionario.setdefault(v.strip(), len(diccionario)) for v in campos),
+                       dtype=np.int32, count=len(campos))
+
+
+def _firma(ruta, tipos, separador, estricto, dtype):
+    estado = os.stat(ruta)
+    return {"version": VERSION_CACHE, "tamano": estado.st_size, "mtime_ns": estado.st_mtime_ns,
+            "tipos": list(tipos), "separador": separador, "estricto": estricto,
+            "dtype": np.dtype(dtype).str}
+
+
+def _leer_cache(carpeta, firma):
+    try:
+        with open(os.path.join(carpeta, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("firma") != firma:
+        return None
+    columnas = [np.load(os.path.join(carpeta, f'col{j}.npy'), mmap_mode='r') for j in range(len(firma["tipos"]))]
+    return columnas, meta["categorias"]
+
+
+def _escribir_cache(ruta, carpeta, firma, tipos, separador, tam_bloque, estricto, dtype):
+    """Vuelca cada bloque a un fichero binario por columna y al final lo pasa a .npy.
+
+    Así nunca hay más de un bloque de texto en memoria aunque el CSV ocupe varios GB.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    temporales = [open(os.path.join(carpeta, f'col{j}.tmp'), 'wb') for j in range(len(tipos))]
+    diccionarios = [{} if t == 'cat' else None for t in tipos]
+    n_filas = 0
+    try:
+        for bloque in _bloques(ruta, tipos, separador, tam_bloque, estricto):
+            for j, campos in enumerate(bloque):
+                temporales[j].write(_convertir(campos, tipos[j], diccionarios[j], dtype).tobytes())
+            n_filas += len(bloque[0])
+    finally:
+        for f in temporales:
+            f.close()
+
+    for j, tipo in enumerate(tipos):
+        tipo_col = np.dtype(dtype) if tipo == 'num' else np.dtype(np.int32)
+        temporal = os.path.join(carpeta, f'col{j}.tmp')
+        destino = np.lib.format.open_memmap(os.path.join(carpeta, f'col{j}.npy'), mode='w+',
+                                            dtype=tipo_col, shape=(n_filas,))
+        for desde in range(0, n_filas, tam_bloque):
+            cuantos = min(tam_bloque, n_filas - desde)
+            destino[desde:desde + cuantos] = np.fromfile(temporal, dtype=tipo_col, count=cuantos,
+                                                         offset=desde * tipo_col.itemsize)
+        destino.flush()
+        del destino
+        os.remove(temporal)
+
+    categorias = [list(d) if d is not None else None for d in diccionarios]
+    with open(os.path.join(carpeta, 'meta.json'), 'w') as f:
+        json.dump({"firma": firma, "n_filas": n_filas, "categorias": categorias}, f)
+
+
+def cargar_csv(ruta, tipos=None, separador=',', tam_bloque=65536, cache=True, estricto=True, dtype=np.float64):
+    """Carga un CSV sin cabecera como columnas NumPy tipadas.
+
+    `tipos` indica 'num' o 'cat' por columna (si es None se deduce de la primera
+    línea). Las columnas categóricas se codifican como int32 y su diccionario se
+    construye sobre la marcha en orden de aparición. Con `estricto=False` se
+    aceptan líneas con campos de más y se ignoran los sobrantes.
+
+    Devuelve (columnas, categorias): columnas[j] es un array y categorias[j] la
+    lista de valores de la columna j (None si es numérica). Con `cache=True` el
+    resultado se guarda junto al CSV en `<ruta>.cache/` y las siguientes cargas
+    lo abren con memoria mapeada sin volver a leer el texto.
+    """
+    if tipos is None:
+        tipos = detectar_tipos(ruta, separador)
+    tipos = list(tipos)
+
+    if not cache:
+        diccionarios = [{} if t == 'cat' else None for t in tipos]
+        partes = [[] for _ in tipos]
+        for bloque in _bloques(ruta, tipos, separador, tam_bloque, estricto):
+            for j, campos in enumerate(bloque):
+                partes[j].append(_convertir(campos, tipos[j], diccionarios[j], dtype))
+        columnas = []
+        for j, tipo in enumerate(tipos):
+            vacio = np.empty(0, dtype=dtype if tipo == 'num' else np.int32)
+            columnas.append(np.concatenate(partes[j]) if partes[j] else vacio)
+        return columnas, [list(d) if d is not None else None for d in diccionarios]
+
+    carpeta = ruta + '.cache'
+    firma = _firma(ruta, tipos, separador, estricto, dtype)
+    guardado = _leer_cache(carpeta, firma)
+    if guardado is None:
+        _escribir_cache(ruta, carpeta, firma, tipos, separador, tam_bloque, estricto, dtype)
+        guardado = _leer_cache(carpeta, firma)
+    return guardado
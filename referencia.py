@@ -0,0 +1,172 @@
+"""Implementaciones originales de los tres proyectos, tal como estaban antes de optimizarlos.
+
+Sólo las usa benchmark.py para medir cada optimización contra el código de
+partida. El cuerpo de cada función es el original; lo único que cambia es
+que el estado que antes venía de variables globales (cuadrícula, obstáculos,
+centroides iniciales) se pasa como argumento.
+"""
+import math
+from queue import PriorityQueue
+
+import numpy as np
+
+# ============================
+# A* original (A_Estrella/main.py)
+# ============================
+
+
+class Nodo:
+    def __init__(self, posicion, padre=None):
+        self.posicion = posicion
+        self.padre = padre
+        self.g = 0
+        self.h = 0
+        self.f = 0
+
+    def __lt__(self, otro):
+        return self.f < otro.f
+
+
+def algoritmo_a_estrella(M, N, obstaculos, celdas_peligrosas, inicio, objetivo):
+    """A* con PriorityQueue, objetos Nodo y obstáculos en una lista."""
+    def distancia_heuristica(nodo1, nodo2):
+        x1, y1 = nodo1
+        x2, y2 = nodo2
+        distancia = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+        if nodo1 in celdas_peligrosas:
+            distancia += celdas_peligrosas[nodo1]
+        return distancia
+
+    abierta = PriorityQueue()
+    abierta.put((0, Nodo(inicio)))
+    cerrada = set()
+    nodos_cerrados = set(obstaculos)
+
+    while not abierta.empty():
+        _, nodo_actual = abierta.get()
+        if nodo_actual.posicion == objetivo:
+            camino = []
+            while nodo_actual:
+                camino.append(nodo_actual.posicion)
+                nodo_actual = nodo_actual.padre
+            return camino[::-1]
+        cerrada.add(nodo_actual.posicion)
+        for delta in [(0, -1), (0, 1), (-1, 0), (1, 0),
+                      (-1, -1), (-1, 1), (1, -1), (1, 1)]:
+            pos_sucesor = (nodo_actual.posicion[0] + delta[0],
+                           nodo_actual.posicion[1] + delta[1])
+            if 0 <= pos_sucesor[0] < M and 0 <= pos_sucesor[1] < N and pos_sucesor not in nodos_cerrados:
+                nodo_sucesor = Nodo(pos_sucesor, nodo_actual)
+                nodo_sucesor.g = nodo_actual.g + distancia_heuristica(nodo_actual.posicion, pos_sucesor)
+                nodo_sucesor.h = distancia_heuristica(pos_sucesor, objetivo)
+                nodo_sucesor.f = nodo_sucesor.g + nodo_sucesor.h
+                if pos_sucesor in cerrada:
+                    continue
+                abierta.put((nodo_sucesor.f, nodo_sucesor))
+    return None
+
+
+# ============================
+# ID3 original (ID3/ID3.py); la clase se llama "Jugar" y vale "positivo" o no
+# ============================
+
+def calcular_infor(p, n):
+    term1 = -p * math.log2(p) if p > 0 else 0
+    term2 = -n * math.log2(n) if n > 0 else 0
+    return term1 + term2
+
+
+def calcular_entropia(datos):
+    total = len(datos)
+    pos = 0
+    neg = 0
+    for ejemplo in datos:
+        decision = ejemplo["Jugar"].strip().lower()
+        if decision == "positivo":
+            pos += 1
+        else:
+            neg += 1
+    p = pos / total
+    n = neg / total
+    return calcular_infor(p, n)
+
+
+def calcular_ganancia_informacion(atributo, ejemplos):
+    entropia_total = calcular_entropia(ejemplos)
+    valores = set(ej[atributo].strip() for ej in ejemplos)
+    sub_entropia = 0
+    for valor in valores:
+        subset = [ej for ej in ejemplos if ej[atributo].strip() == valor]
+        sub_entropia += (len(subset) / len(ejemplos)) * calcular_entropia(subset)
+    return entropia_total - sub_entropia
+
+
+def id3(ejemplos, atributos, nivel=0):
+    decisions = [ej["Jugar"].strip() for ej in ejemplos]
+    if len(set(decisions)) == 1:
+        return decisions[0]
+    if not atributos:
+        return max(set(decisions), key=decisions.count)
+    mejor_atributo = max(atributos, key=lambda attr: calcular_ganancia_informacion(attr, ejemplos))
+    tree = {mejor_atributo: {}}
+    valores = set(ej[mejor_atributo].strip() for ej in ejemplos)
+    for valor in valores:
+        subset = [ej for ej in ejemplos if ej[mejor_atributo].strip() == valor]
+        nuevos_atributos = [attr for attr in atributos if attr != mejor_atributo]
+        subtree = id3(subset, nuevos_atributos, nivel + 1)
+        tree[mejor_atributo][valor] = subtree
+    return tree
+
+
+# ============================
+# Clasificadores originales (Algoritmos de Clasificacion/practica3.py)
+# ============================
+
+def fuzzy_kmeans(X, k, init, tol=0.01, b=2, max_iter=100):
+    centroids = np.array(init, dtype=np.float64)
+    for _ in range(max_iter):
+        dist = np.linalg.norm(X[:, None] - centroids[None, :], axis=2)
+        dist = np.maximum(dist, 1e-6)
+        U = (1.0 / dist**(2 / (b - 1)))
+        U /= U.sum(axis=1, keepdims=True)
+        new_cent = np.zeros_like(centroids)
+        for i in range(k):
+            w = U[:, i]**b
+            new_cent[i] = (w[:, None] * X).sum(axis=0) / w.sum()
+        if np.max(np.linalg.norm(new_cent - centroids, axis=1)) < tol:
+            break
+        centroids = new_cent
+    return centroids
+
+
+def bayes_train(X, y):
+    params = {}
+    for c in np.unique(y):
+        Xc = X[y == c]
+        params[c] = (Xc.mean(axis=0), np.cov(Xc, rowvar=False), Xc.shape[0] / X.shape[0])
+    return params
+
+
+def bayes_predict(X, params):
+    preds = []
+    for x in X:
+        scores = {}
+        for c, (mu, C, prior) in params.items():
+            d = x - mu
+            det = np.linalg.det(C)
+            inv = np.linalg.inv(C)
+            coef = 1 / ((2 * np.pi)**(len(x) / 2) * np.sqrt(det))
+            like = coef * np.exp(-0.5 * d.dot(inv).dot(d))
+            scores[c] = like * prior
+        preds.append(max(scores, key=scores.get))
+    return np.array(preds)
+
+
+def lloyd(X, k, init, eta=0.1, max_iter=10):
+    centroids = np.array(init, dtype=np.float64)
+    for _ in range(max_iter):
+        for x in X:
+            j = np.argmin(np.linalg.norm(centroids - x, axis=1))
+            centroids[j] += eta * (x - centroids[j])
+    return centroids
+